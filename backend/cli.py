@@ -0,0 +1,99 @@
+import argparse
+import sys
+import time
+from datetime import date
+
+from database import create_db_and_tables, engine
+from services.backfill import DEFAULT_CHUNK_DAYS, default_workers, recompute_productivity
+from services.changes import run_scheduled_purge
+from services.occurrences import run_scheduled_roll_forward
+
+
+def _recompute(args: argparse.Namespace) -> int:
+    create_db_and_tables()
+    started = time.monotonic()
+
+    def report(completed: int, total: int, chunk_start: date, chunk_end: date) -> None:
+        elapsed = time.monotonic() - started
+        print(
+            f"[{completed}/{total}] {chunk_start}..{chunk_end} done ({elapsed:.1f}s)",
+            file=sys.stderr,
+        )
+
+    try:
+        days = recompute_productivity(
+            engine,
+            args.start,
+            args.end,
+            workers=args.workers,
+            chunk_days=args.chunk_days,
+            checkpoint=args.checkpoint,
+            progress=report,
+        )
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    print(f"Recomputed {days} days in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+def _roll_forward(args: argparse.Namespace) -> int:
+    create_db_and_tables()
+    started = time.monotonic()
+    result = run_scheduled_roll_forward(
+        engine, {"horizon_days": args.horizon_days, "workers": args.workers}
+    )
+    print(
+        f"Extended {result['tasks']} recurring tasks to {result['until']} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return 0
+
+
+def _purge_tombstones(args: argparse.Namespace) -> int:
+    create_db_and_tables()
+    result = run_scheduled_purge(engine)
+    print(f"Purged {result['purged']} tombstones")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Task management maintenance commands")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    recompute = subcommands.add_parser(
+        "recompute-productivity", help="Recompute stored productivity rollups for a date range"
+    )
+    recompute.add_argument("--start", type=date.fromisoformat, required=True)
+    recompute.add_argument("--end", type=date.fromisoformat, default=date.today())
+    recompute.add_argument("--workers", type=int, default=default_workers())
+    recompute.add_argument("--chunk-days", type=int, default=DEFAULT_CHUNK_DAYS)
+    recompute.add_argument(
+        "--checkpoint",
+        help="File recording finished chunks; rerunning with it resumes where a run stopped",
+    )
+    recompute.set_defaults(func=_recompute)
+
+    roll_forward = subcommands.add_parser(
+        "roll-forward-occurrences", help="Extend stored occurrences of recurring tasks"
+    )
+    roll_forward.add_argument(
+        "--horizon-days", type=int, help="Days ahead to store (default: OCCURRENCE_HORIZON_DAYS)"
+    )
+    roll_forward.add_argument(
+        "--workers", type=int, default=1, help="Processes to expand rules across"
+    )
+    roll_forward.set_defaults(func=_roll_forward)
+
+    purge = subcommands.add_parser(
+        "purge-tombstones", help="Delete tombstones older than TOMBSTONE_RETENTION_DAYS"
+    )
+    purge.set_defaults(func=_purge_tombstones)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,16 @@ class Settings(BaseSettings):
     api_password: str = "secret-password"
     debug: bool = True
     cors_origins: str = "http://localhost:3000"
+    tombstone_retention_days: int = 90
+    compression_minimum_size: int = 1024
+    sse_heartbeat_seconds: float = 15.0
+    productivity_cache_size: int = 1024
+    recurrence_rule_cache_size: int = 512
+    occurrence_cache_size: int = 4096
+    occurrence_horizon_days: int = 180
+    occurrence_lookback_days: int = 30
+    reminder_scheduler_enabled: bool = True
+    reminder_webhook_url: str = ""
 
     @property
     def cors_origins_list(self) -> list[str]:
@@ -1,8 +1,12 @@
+import sqlite3
 from collections.abc import Generator
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, SQLModel, create_engine
 
 from config import settings
+from models import create_task_search
 
 engine = create_engine(
     settings.database_url,
@@ -11,8 +15,39 @@ engine = create_engine(
 )
 
 
+# pysqlite defers BEGIN until the first write, so a SAVEPOINT taken before one
+# opens the transaction itself and releasing it commits. Let SQLAlchemy emit
+# BEGIN instead, as the SQLAlchemy docs recommend, so savepoints nest properly.
+@event.listens_for(Engine, "connect")
+def _disable_pysqlite_begin(dbapi_connection, connection_record) -> None:
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.isolation_level = None
+
+
+# In the default rollback journal a reader's SHARED lock blocks every commit,
+# so an NDJSON stream being drained by a slow client would lock out writers.
+# With WAL, readers see a snapshot and writers commit alongside them.
+# In-memory databases keep their own journal mode and ignore this.
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_wal(dbapi_connection, connection_record) -> None:
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
+@event.listens_for(Engine, "begin")
+def _begin_sqlite_transaction(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN")
+
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all skips existing tables, so indexes added to them later are created here.
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    with engine.begin() as connection:
+        create_task_search(connection)
 
 
 def get_session() -> Generator[Session, None, None]:
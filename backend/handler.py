@@ -1,5 +1,24 @@
 from mangum import Mangum
 
+from database import engine
 from main import app
+from services.backfill import run_scheduled_recompute
+from services.changes import run_scheduled_purge
+from services.occurrences import run_scheduled_roll_forward
 
 handler = Mangum(app, lifespan="off")
+
+
+def scheduled_handler(event, context):
+    """Entry point for scheduled (cron) invocations.
+
+    ``event["job"]`` picks the job: ``roll-forward-occurrences`` extends stored
+    occurrences of recurring tasks, ``purge-tombstones`` deletes tombstones past
+    the retention window; anything else refreshes recent productivity rollups.
+    """
+    event = event if isinstance(event, dict) else {}
+    if event.get("job") == "roll-forward-occurrences":
+        return run_scheduled_roll_forward(engine, event)
+    if event.get("job") == "purge-tombstones":
+        return run_scheduled_purge(engine, event)
+    return run_scheduled_recompute(engine, event)
@@ -2,9 +2,11 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
 
 from config import settings
-from database import create_db_and_tables
+from database import create_db_and_tables, engine
+from middleware import NegotiatedJSONResponse, ResponseEncodingMiddleware
 from routers import (
     categories_router,
     notifications_router,
@@ -13,12 +15,17 @@ from routers import (
     tasks_router,
     time_blocks_router,
 )
+from services import NEXT_CURSOR_HEADER, reminder_scheduler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    with Session(engine) as session:
+        if settings.reminder_scheduler_enabled:
+            reminder_scheduler.start(session)
     yield
+    await reminder_scheduler.stop()
 
 
 app = FastAPI(
@@ -26,6 +33,7 @@ app = FastAPI(
     description="FastAPI backend with SQLModel/SQLite persistence for task management",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=NegotiatedJSONResponse,
 )
 
 app.add_middleware(
@@ -34,7 +42,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+app.add_middleware(ResponseEncodingMiddleware, minimum_size=settings.compression_minimum_size)
 
 app.include_router(tasks_router)
 app.include_router(categories_router)
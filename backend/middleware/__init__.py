@@ -1,3 +1,4 @@
 from middleware.auth import verify_api_key
+from middleware.encoding import NegotiatedJSONResponse, ResponseEncodingMiddleware
 
-__all__ = ["verify_api_key"]
+__all__ = ["verify_api_key", "NegotiatedJSONResponse", "ResponseEncodingMiddleware"]
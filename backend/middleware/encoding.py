@@ -0,0 +1,211 @@
+import gzip
+import json
+import zlib
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+COLUMNAR_MEDIA_TYPE = "application/vnd.columnar+json"
+STREAMED_MEDIA_TYPES = ("application/x-ndjson",)
+BUFFERED_MEDIA_TYPES = ("application/json", COLUMNAR_MEDIA_TYPE, *MSGPACK_MEDIA_TYPES)
+# API responses are generated per request, so favour speed over ratio.
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 6
+
+# Wire format negotiated for the current request, read by NegotiatedJSONResponse.
+response_format: ContextVar[str | None] = ContextVar("response_format", default=None)
+
+
+def _accepted(header: str) -> dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            accepted[media_type.lower()] = quality
+    return accepted
+
+
+def _choose_format(accept: str) -> str | None:
+    accepted = _accepted(accept)
+    if msgpack is not None and any(accepted.get(t, 0) > 0 for t in MSGPACK_MEDIA_TYPES):
+        return "msgpack"
+    if accepted.get(COLUMNAR_MEDIA_TYPE, 0) > 0:
+        return "columnar"
+    return None
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def to_columnar(data):
+    """Hoist the keys of a list of uniform objects into a single header row."""
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        return None
+    columns = list(data[0]) if data else []
+    if any(list(item) != columns for item in data):
+        return None
+    return {"columns": columns, "rows": [[item[key] for key in columns] for item in data]}
+
+
+class NegotiatedJSONResponse(JSONResponse):
+    """JSON response rendered in the wire format ``ResponseEncodingMiddleware`` negotiated.
+
+    FastAPI hands the response class the content it has already converted to
+    JSON-compatible data, so MessagePack and columnar bodies are encoded from
+    that directly instead of from rendered JSON. Columnar only applies to lists
+    of uniform objects; anything else is sent as JSON.
+    """
+
+    def render(self, content: Any) -> bytes:
+        body_format = response_format.get()
+        if body_format == "msgpack":
+            self.media_type = MSGPACK_MEDIA_TYPES[0]
+            return msgpack.packb(content, use_bin_type=True)
+        if body_format == "columnar" and (columnar := to_columnar(content)) is not None:
+            self.media_type = COLUMNAR_MEDIA_TYPE
+            return json.dumps(columnar, ensure_ascii=False, separators=(",", ":")).encode()
+        return super().render(content)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class ResponseEncodingMiddleware:
+    """Negotiate the wire format and compression of API responses.
+
+    The format asked for via ``Accept`` is published in ``response_format`` for
+    ``NegotiatedJSONResponse`` to render with; the middleware never parses a
+    body. JSON, MessagePack and columnar bodies are compressed with brotli or
+    gzip when they reach ``minimum_size`` and ``Accept-Encoding`` allows it.
+    NDJSON streams are compressed chunk by chunk so rows still reach the client
+    as they are read; anything else, such as event streams, passes through
+    untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        body_format = _choose_format(request_headers.get("accept", ""))
+        encoding = _choose_encoding(request_headers.get("accept-encoding", ""))
+        if body_format is None and encoding is None:
+            await self.app(scope, receive, send)
+            return
+        token = response_format.set(body_format)
+
+        start_message: Message | None = None
+        body = bytearray()
+        mode = "passthrough"
+        compressor = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, mode, compressor
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or message["status"] in (204, 304):
+                    mode = "passthrough"
+                elif content_type.startswith(BUFFERED_MEDIA_TYPES):
+                    mode = "buffer"
+                elif encoding and content_type.startswith(STREAMED_MEDIA_TYPES):
+                    mode = "stream"
+                    compressor = _StreamCompressor(encoding)
+                    response_headers = MutableHeaders(raw=message["headers"])
+                    del response_headers["content-length"]
+                    response_headers["content-encoding"] = encoding
+                    response_headers.add_vary_header("Accept-Encoding")
+                else:
+                    mode = "passthrough"
+
+                if mode == "buffer":
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if mode == "passthrough":
+                await send(message)
+            elif mode == "stream":
+                more_body = message.get("more_body", False)
+                data = compressor.chunk(message.get("body", b""))
+                if not more_body:
+                    data += compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+            else:
+                body.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._send_buffered(send, start_message, bytes(body), encoding)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            response_format.reset(token)
+
+    async def _send_buffered(
+        self, send: Send, start_message: Message, body: bytes, encoding
+    ) -> None:
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers.add_vary_header("Accept")
+
+        if encoding:
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) >= self.minimum_size:
+                if encoding == "br":
+                    body = brotli.compress(body, quality=BROTLI_QUALITY)
+                else:
+                    body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+                headers["content-encoding"] = encoding
+
+        headers["content-length"] = str(len(body))
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
@@ -1,7 +1,27 @@
 from models.category import Category
+from models.change_log import ChangeLog
+from models.productivity_day import ProductivityDay
 from models.productivity_log import ProductivityLog
 from models.subtask import SubTask
+from models.table_version import TableVersion
 from models.task import Task
+from models.task_occurrence import OccurrenceHorizon, TaskOccurrence
+from models.task_search import create_task_search, tasks_fts
 from models.time_block import TimeBlock
+from models.tombstone import Tombstone
 
-__all__ = ["Task", "SubTask", "Category", "TimeBlock", "ProductivityLog"]
+__all__ = [
+    "Task",
+    "SubTask",
+    "Category",
+    "TimeBlock",
+    "TaskOccurrence",
+    "OccurrenceHorizon",
+    "ProductivityLog",
+    "ProductivityDay",
+    "ChangeLog",
+    "Tombstone",
+    "TableVersion",
+    "tasks_fts",
+    "create_task_search",
+]
@@ -14,4 +14,4 @@ class Category(SQLModel, table=True):
     icon: str | None = Field(default=None, max_length=50)
     is_default: bool = Field(default=False)
     created_at: datetime = Field(default_factory=utcnow)
-    updated_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow, index=True)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+from utils import utcnow
+
+
+class ChangeLog(SQLModel, table=True):
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: int | None = Field(default=None, primary_key=True)
+    entity_type: str = Field(max_length=20)
+    entity_id: int
+    operation: str = Field(max_length=10)
+    changed_at: datetime = Field(default_factory=utcnow)
@@ -0,0 +1,16 @@
+import datetime as dt
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+from utils import utcnow
+
+
+class ProductivityDay(SQLModel, table=True):
+    __tablename__ = "productivity_days"
+
+    date: dt.date = Field(primary_key=True)
+    score: float = Field(default=0.0, ge=0.0, le=100.0)
+    tasks_completed: int = Field(default=0, ge=0)
+    time_spent: int = Field(default=0, ge=0)
+    updated_at: datetime = Field(default_factory=utcnow)
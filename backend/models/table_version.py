@@ -0,0 +1,8 @@
+from sqlmodel import Field, SQLModel
+
+
+class TableVersion(SQLModel, table=True):
+    __tablename__ = "table_versions"
+
+    table_name: str = Field(primary_key=True, max_length=50)
+    version: int = Field(default=0)
@@ -1,12 +1,28 @@
 from datetime import datetime
 
-from sqlmodel import Field, SQLModel
+from sqlalchemy import text
+from sqlmodel import Field, Index, SQLModel
 
 from utils import utcnow
 
 
 class Task(SQLModel, table=True):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Pending reminders only. is_completed leads so the planner picks this
+        # index over ix_tasks_is_completed even before ANALYZE has run.
+        Index(
+            "ix_tasks_pending_reminder_time",
+            "is_completed",
+            "reminder_time",
+            sqlite_where=text("is_completed = 0"),
+            postgresql_where=text("NOT is_completed"),
+        ),
+        # Filtered task lists walk these in created_at order, so deep pages
+        # don't sort every matching row.
+        Index("ix_tasks_category_id_created_at", "category_id", "created_at"),
+        Index("ix_tasks_is_completed_created_at", "is_completed", "created_at"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     title: str = Field(index=True, max_length=255)
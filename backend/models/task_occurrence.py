@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlmodel import Field, Index, SQLModel, UniqueConstraint
+
+from utils import utcnow
+
+
+class TaskOccurrence(SQLModel, table=True):
+    __tablename__ = "task_occurrences"
+    __table_args__ = (
+        UniqueConstraint("task_id", "occurs_at"),
+        Index("ix_task_occurrences_occurs_at_task_id", "occurs_at", "task_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    task_id: int = Field(foreign_key="tasks.id", ondelete="CASCADE")
+    occurs_at: datetime
+    is_completed: bool = Field(default=False)
+    completed_at: datetime | None = Field(default=None)
+    updated_at: datetime = Field(default_factory=utcnow)
+
+
+class OccurrenceHorizon(SQLModel, table=True):
+    """The span ``[generated_from, generated_until)`` a task's occurrences are stored for."""
+
+    __tablename__ = "occurrence_horizons"
+
+    task_id: int = Field(foreign_key="tasks.id", primary_key=True, ondelete="CASCADE")
+    generated_from: datetime
+    generated_until: datetime = Field(index=True)
@@ -0,0 +1,72 @@
+from sqlalchemy import column, event, table, text
+
+from models.task import Task
+
+# FTS5 index over the text of tasks. It is an external-content table: the text
+# stays in ``tasks`` and the index holds only the tokens, kept current by
+# triggers so every write path, including set-based batch writes, updates it.
+# SQLite only; other databases have no ``tasks_fts``.
+
+# Column weights for BM25 ranking, in index column order.
+TITLE_WEIGHT, DESCRIPTION_WEIGHT, NOTES_WEIGHT = 10.0, 2.0, 1.0
+
+tasks_fts = table("tasks_fts", column("rowid"), column("rank"))
+
+TASK_SEARCH_DDL = (
+    # Prefix indexes make two- and three-character search-as-you-type lookups
+    # read a single term instead of scanning every term with that prefix.
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, notes,
+        content='tasks', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, title, description, notes)
+        VALUES (new.id, new.title, new.description, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description, notes)
+        VALUES ('delete', old.id, old.title, old.description, old.notes);
+    END
+    """,
+    # Only text changes touch the index; completing or moving a task does not.
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update
+    AFTER UPDATE OF title, description, notes ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description, notes)
+        VALUES ('delete', old.id, old.title, old.description, old.notes);
+        INSERT INTO tasks_fts (rowid, title, description, notes)
+        VALUES (new.id, new.title, new.description, new.notes);
+    END
+    """,
+)
+
+
+def create_task_search(connection) -> None:
+    """Create ``tasks_fts`` and its triggers if missing, indexing existing tasks.
+
+    Does nothing on databases other than SQLite.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")
+    ).first()
+    for statement in TASK_SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(
+            text("INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('rank', :rank)"),
+            {"rank": f"bm25({TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}, {NOTES_WEIGHT})"},
+        )
+        connection.execute(text("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')"))
+
+
+@event.listens_for(Task.__table__, "after_create")
+def _create_task_search(target, connection, **kw) -> None:
+    create_task_search(connection)
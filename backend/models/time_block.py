@@ -1,12 +1,13 @@
 from datetime import datetime
 
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 from utils import utcnow
 
 
 class TimeBlock(SQLModel, table=True):
     __tablename__ = "time_blocks"
+    __table_args__ = (Index("ix_time_blocks_task_id_start_time", "task_id", "start_time"),)
 
     id: int | None = Field(default=None, primary_key=True)
     task_id: int | None = Field(default=None, foreign_key="tasks.id", index=True)
@@ -15,4 +16,4 @@ class TimeBlock(SQLModel, table=True):
     title: str | None = Field(default=None, max_length=255)
     description: str | None = Field(default=None)
     created_at: datetime = Field(default_factory=utcnow)
-    updated_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow, index=True)
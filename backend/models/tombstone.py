@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlmodel import Field, Index, SQLModel
+
+from utils import utcnow
+
+
+class Tombstone(SQLModel, table=True):
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_entity_type_deleted_at", "entity_type", "deleted_at"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    entity_type: str = Field(max_length=20)
+    entity_id: int
+    deleted_at: datetime = Field(default_factory=utcnow, index=True)
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 
 from database import get_session
 from middleware import verify_api_key
 from models import Category
 from schemas import CategoryCreate, CategoryResponse, CategoryUpdate
-from utils import utcnow
+from services import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    conditional_get,
+    keyset_page,
+    keyset_query,
+    limit_stream,
+    mutations,
+    stream_ndjson,
+    wants_ndjson,
+)
 
 router = APIRouter(
     prefix="/api/categories", tags=["categories"], dependencies=[Depends(verify_api_key)]
@@ -14,8 +24,7 @@ router = APIRouter(
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(category_data: CategoryCreate, session: Session = Depends(get_session)):
-    category = Category(**category_data.model_dump())
-    session.add(category)
+    category = mutations.create_category(session, category_data)
     session.commit()
     session.refresh(category)
     return category
@@ -23,10 +32,40 @@ def create_category(category_data: CategoryCreate, session: Session = Depends(ge
 
 @router.get("", response_model=list[CategoryResponse])
 def get_categories(
-    skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
+    session: Session = Depends(get_session),
 ):
-    query = select(Category).offset(skip).limit(limit).order_by(Category.name)
-    categories = session.exec(query).all()
+    if skip and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either skip or cursor, not both"
+        )
+
+    if not_modified := conditional_get(request, response, session, [Category.__tablename__]):
+        return not_modified
+
+    query = select(Category)
+    columns = [Category.name, Category.id]
+
+    if wants_ndjson(request):
+        query = keyset_query(query, columns, cursor).offset(skip)
+        return stream_ndjson(
+            session,
+            limit_stream(request, query, limit),
+            CategoryResponse,
+            headers={"ETag": response.headers["ETag"]},
+        )
+
+    if skip:
+        query = keyset_query(query, columns, None).offset(skip)
+        return session.exec(query.limit(limit)).all()
+
+    categories, next_cursor = keyset_page(session, query, columns, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return categories
 
 
@@ -46,12 +85,7 @@ def update_category(
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    update_data = category_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(category, field, value)
-
-    category.updated_at = utcnow()
-    session.add(category)
+    mutations.update_category(session, category, category_data.model_dump(exclude_unset=True))
     session.commit()
     session.refresh(category)
     return category
@@ -63,12 +97,6 @@ def delete_category(category_id: int, session: Session = Depends(get_session)):
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    if category.is_default:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete default category",
-        )
-
-    session.delete(category)
+    mutations.delete_category(session, category)
     session.commit()
     return None
@@ -1,37 +1,59 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy import false
 from sqlmodel import Session, select
 
+from config import settings
 from database import get_session
 from middleware import verify_api_key
 from models import Task
-from utils import utcnow
+from services import reminder_events, reminder_scheduler
+from utils import to_naive_utc, utcnow
 
 router = APIRouter(
     prefix="/api/notifications", tags=["notifications"], dependencies=[Depends(verify_api_key)]
 )
 
 
+MAX_UPCOMING_WINDOW = timedelta(days=31)
+
+
 class NextReminderResponse(BaseModel):
     task_id: int | None
     task_title: str | None
     reminder_time: datetime | None
 
 
-@router.get("/next-reminder", response_model=NextReminderResponse)
-def get_next_reminder(session: Session = Depends(get_session)):
-    now = utcnow()
+class UpcomingReminderResponse(BaseModel):
+    task_id: int
+    task_title: str
+    reminder_time: datetime
+
 
-    query = (
-        select(Task)
-        .where(Task.reminder_time > now, Task.is_completed == False)
+def _pending_reminders(after: datetime):
+    # A literal false (not a bound parameter) lets SQLite match the partial
+    # index ix_tasks_pending_reminder_time.
+    return (
+        select(Task.id, Task.title, Task.reminder_time)
+        .where(Task.is_completed == false(), Task.reminder_time > after)
         .order_by(Task.reminder_time)
-        .limit(1)
     )
 
-    next_task = session.exec(query).first()
+
+@router.get("/next-reminder", response_model=NextReminderResponse)
+def get_next_reminder(session: Session = Depends(get_session)):
+    if reminder_scheduler.loaded:
+        reminder = reminder_scheduler.peek()
+        return NextReminderResponse(
+            task_id=reminder and reminder.task_id,
+            task_title=reminder and reminder.title,
+            reminder_time=reminder and reminder.reminder_time,
+        )
+
+    next_task = session.exec(_pending_reminders(to_naive_utc(utcnow())).limit(1)).first()
 
     if next_task:
         return NextReminderResponse(
@@ -41,3 +63,39 @@ def get_next_reminder(session: Session = Depends(get_session)):
         )
 
     return NextReminderResponse(task_id=None, task_title=None, reminder_time=None)
+
+
+@router.get("/upcoming", response_model=list[UpcomingReminderResponse])
+def get_upcoming_reminders(
+    within: timedelta = Query(
+        timedelta(days=1),
+        description="How far ahead to look, as an ISO 8601 duration such as PT6H",
+    ),
+    limit: int = Query(100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+):
+    """Every pending reminder due within ``within`` from now, soonest first."""
+    if within <= timedelta() or within > MAX_UPCOMING_WINDOW:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"within must be positive and at most {MAX_UPCOMING_WINDOW.days} days",
+        )
+
+    now = to_naive_utc(utcnow())
+    rows = session.exec(
+        _pending_reminders(now).where(Task.reminder_time <= now + within).limit(limit)
+    ).all()
+    return [
+        UpcomingReminderResponse(task_id=task_id, task_title=title, reminder_time=reminder_time)
+        for task_id, title, reminder_time in rows
+    ]
+
+
+@router.get("/stream")
+async def stream_reminders(request: Request):
+    """Push reminders as Server-Sent Events the moment they fall due."""
+    return StreamingResponse(
+        reminder_events(settings.sse_heartbeat_seconds, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
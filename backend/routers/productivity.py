@@ -1,33 +1,79 @@
 from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlmodel import Session, select
 
 from database import get_session
 from middleware import verify_api_key
 from models import Category
-from schemas import CategoryProductivity, ProductivitySummary
-from services import get_productivity_summary
+from schemas import CategoryProductivity, ProductivityRange, ProductivitySummary
+from services import (
+    PRODUCTIVITY_TABLES,
+    aggregate_productivity,
+    conditional_get,
+    get_cached_summary,
+    get_category_productivity,
+    get_productivity_range,
+    peek_cached_summary,
+    summary_cache,
+)
 
 router = APIRouter(
     prefix="/api/productivity", tags=["productivity"], dependencies=[Depends(verify_api_key)]
 )
 
+MAX_RANGE_DAYS = 731
+MAX_BATCH_CATEGORIES = 100
+
 
 @router.get("/summary", response_model=ProductivitySummary)
 def get_daily_summary(
+    request: Request,
+    response: Response,
     target_date: date = Query(None, description="Target date for productivity summary"),
     session: Session = Depends(get_session),
 ):
     if target_date is None:
         target_date = date.today()
 
-    summary = get_productivity_summary(session, target_date)
-    return summary
+    if not_modified := conditional_get(
+        request, response, session, PRODUCTIVITY_TABLES, target_date
+    ):
+        return not_modified
+
+    return get_cached_summary(session, target_date)
+
+
+def _category_productivity(
+    session: Session, target_date: date, categories: list[Category]
+) -> list[CategoryProductivity]:
+    summary = peek_cached_summary(session, target_date)
+    if summary is not None:
+        found = {cat_data["category_id"]: cat_data for cat_data in summary["categories"]}
+    else:
+        found = get_category_productivity(
+            session, target_date, [category.id for category in categories]
+        )
+
+    return [
+        CategoryProductivity(**found[category.id])
+        if category.id in found
+        else CategoryProductivity(
+            category_id=category.id,
+            category_name=category.name,
+            tasks_completed=0,
+            time_spent=0,
+            score=0.0,
+        )
+        for category in categories
+    ]
 
 
 @router.get("/category/{category_id}", response_model=CategoryProductivity)
-def get_category_productivity(
+def get_category_productivity_for_day(
+    request: Request,
+    response: Response,
     category_id: int,
     target_date: date = Query(None, description="Target date for productivity summary"),
     session: Session = Depends(get_session),
@@ -35,20 +81,78 @@ def get_category_productivity(
     if target_date is None:
         target_date = date.today()
 
+    if not_modified := conditional_get(
+        request, response, session, PRODUCTIVITY_TABLES, target_date
+    ):
+        return not_modified
+
     category = session.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    summary = get_productivity_summary(session, target_date)
+    return _category_productivity(session, target_date, [category])[0]
+
+
+@router.get("/categories", response_model=list[CategoryProductivity])
+def get_categories_productivity(
+    request: Request,
+    response: Response,
+    category_ids: list[int] = Query(..., max_length=MAX_BATCH_CATEGORIES),
+    target_date: date = Query(None, description="Target date for productivity summary"),
+    session: Session = Depends(get_session),
+):
+    if target_date is None:
+        target_date = date.today()
+
+    if not_modified := conditional_get(
+        request, response, session, PRODUCTIVITY_TABLES, target_date
+    ):
+        return not_modified
 
-    for cat_data in summary["categories"]:
-        if cat_data["category_id"] == category_id:
-            return CategoryProductivity(**cat_data)
+    category_ids = list(dict.fromkeys(category_ids))
+    categories = {
+        category.id: category
+        for category in session.exec(select(Category).where(Category.id.in_(category_ids)))
+    }
+    if len(categories) != len(category_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    return CategoryProductivity(
-        category_id=category_id,
-        category_name=category.name,
-        tasks_completed=0,
-        time_spent=0,
-        score=0.0,
+    return _category_productivity(
+        session, target_date, [categories[category_id] for category_id in category_ids]
     )
+
+
+@router.get("/range", response_model=ProductivityRange)
+def get_productivity_over_range(
+    request: Request,
+    response: Response,
+    start: date = Query(..., description="First day of the range"),
+    end: date = Query(..., description="Last day of the range (inclusive)"),
+    granularity: Literal["day", "week", "month"] = Query("day"),
+    session: Session = Depends(get_session),
+):
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="end must not be before start"
+        )
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range cannot exceed {MAX_RANGE_DAYS} days",
+        )
+
+    if not_modified := conditional_get(request, response, session, PRODUCTIVITY_TABLES):
+        return not_modified
+
+    daily = get_productivity_range(session, start, end)
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "periods": aggregate_productivity(daily, granularity),
+    }
+
+
+@router.get("/cache-stats")
+def get_summary_cache_stats():
+    return summary_cache.stats()
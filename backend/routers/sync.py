@@ -1,59 +1,252 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
 
+from config import settings
 from database import get_session
 from middleware import verify_api_key
-from models import Category, Task, TimeBlock
-from schemas import CategoryResponse, TaskResponse, TimeBlockResponse
+from models import Category, SubTask, Task, TimeBlock, Tombstone
+from schemas import (
+    CategoryResponse,
+    ChangesResponse,
+    PushRequest,
+    PushResponse,
+    TaskListItem,
+    TimeBlockResponse,
+    TombstoneResponse,
+)
+from schemas.sync import EntityType
+from services import (
+    INCLUDE_SCHEMAS,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    TaskInclude,
+    apply_push,
+    change_events,
+    conditional_get,
+    get_changes,
+    keyset_page,
+    keyset_query,
+    limit_stream,
+    stream_ndjson,
+    subtask_expander,
+    tombstone_cutoff,
+    wants_ndjson,
+)
+from utils import to_naive_utc
 
 router = APIRouter(prefix="/api/sync", tags=["sync"], dependencies=[Depends(verify_api_key)])
 
+DEFAULT_PAGE_SIZE = 500
+
+SYNCED_TABLES = [
+    Task.__tablename__,
+    SubTask.__tablename__,
+    Category.__tablename__,
+    TimeBlock.__tablename__,
+]
+
+
+def _sync_page(
+    request: Request,
+    response: Response,
+    session: Session,
+    tables,
+    query,
+    columns,
+    schema,
+    cursor,
+    limit,
+    expand=None,
+):
+    if not_modified := conditional_get(request, response, session, tables):
+        return not_modified
+
+    if wants_ndjson(request):
+        query = limit_stream(request, keyset_query(query, columns, cursor), limit)
+        return stream_ndjson(
+            session, query, schema, headers={"ETag": response.headers["ETag"]}, expand=expand
+        )
+
+    rows, next_cursor = keyset_page(session, query, columns, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return expand(rows) if expand else rows
+
+
+def _modified_since_page(
+    request: Request,
+    response: Response,
+    session: Session,
+    model,
+    schema,
+    modified_since,
+    cursor,
+    limit,
+    related_tables=(),
+    expand=None,
+):
+    query = select(model)
 
-@router.get("/tasks", response_model=list[TaskResponse])
+    if modified_since:
+        query = query.where(model.updated_at > modified_since)
+
+    return _sync_page(
+        request,
+        response,
+        session,
+        [model.__tablename__, *related_tables],
+        query,
+        [model.updated_at, model.id],
+        schema,
+        cursor,
+        limit,
+        expand,
+    )
+
+
+@router.get("/tasks", response_model=list[TaskListItem])
 def sync_tasks(
-    modified_since: datetime | None = Query(None, description="Get tasks modified after this timestamp"),
+    request: Request,
+    response: Response,
+    modified_since: datetime | None = Query(
+        None, description="Get tasks modified after this timestamp"
+    ),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include: TaskInclude | None = Query(
+        None, description="Embed each task's subtasks, or only their completion counts"
+    ),
     session: Session = Depends(get_session),
 ):
-    query = select(Task)
-
-    if modified_since:
-        query = query.where(Task.updated_at > modified_since)
-
-    query = query.order_by(Task.updated_at.desc())
-
-    tasks = session.exec(query).all()
-    return tasks
+    return _modified_since_page(
+        request,
+        response,
+        session,
+        Task,
+        INCLUDE_SCHEMAS[include],
+        modified_since,
+        cursor,
+        limit,
+        related_tables=[SubTask.__tablename__] if include else (),
+        expand=subtask_expander(session, include),
+    )
 
 
 @router.get("/categories", response_model=list[CategoryResponse])
 def sync_categories(
-    modified_since: datetime | None = Query(None, description="Get categories modified after this timestamp"),
+    request: Request,
+    response: Response,
+    modified_since: datetime | None = Query(
+        None, description="Get categories modified after this timestamp"
+    ),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
 ):
-    query = select(Category)
-
-    if modified_since:
-        query = query.where(Category.updated_at > modified_since)
-
-    query = query.order_by(Category.updated_at.desc())
-
-    categories = session.exec(query).all()
-    return categories
+    return _modified_since_page(
+        request, response, session, Category, CategoryResponse, modified_since, cursor, limit
+    )
 
 
 @router.get("/time-blocks", response_model=list[TimeBlockResponse])
 def sync_time_blocks(
-    modified_since: datetime | None = Query(None, description="Get time blocks modified after this timestamp"),
+    request: Request,
+    response: Response,
+    modified_since: datetime | None = Query(
+        None, description="Get time blocks modified after this timestamp"
+    ),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     session: Session = Depends(get_session),
 ):
-    query = select(TimeBlock)
-
-    if modified_since:
-        query = query.where(TimeBlock.updated_at > modified_since)
+    return _modified_since_page(
+        request, response, session, TimeBlock, TimeBlockResponse, modified_since, cursor, limit
+    )
 
-    query = query.order_by(TimeBlock.updated_at.desc())
 
-    time_blocks = session.exec(query).all()
-    return time_blocks
+@router.get("/changes", response_model=ChangesResponse)
+def sync_changes(
+    request: Request,
+    response: Response,
+    since: int = Query(0, ge=0, description="Return changes after this sequence number"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session),
+):
+    if not_modified := conditional_get(request, response, session, SYNCED_TABLES):
+        return not_modified
+
+    return get_changes(session, since, limit)
+
+
+@router.get("/deletions", response_model=list[TombstoneResponse])
+def sync_deletions(
+    request: Request,
+    response: Response,
+    entity_type: EntityType | None = Query(None, description="Only return this entity type"),
+    deleted_since: datetime | None = Query(
+        None, description="Get deletions recorded after this timestamp"
+    ),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session),
+):
+    query = select(Tombstone)
+
+    if entity_type:
+        query = query.where(Tombstone.entity_type == entity_type)
+
+    if deleted_since:
+        deleted_since = to_naive_utc(deleted_since)
+        if deleted_since < to_naive_utc(tombstone_cutoff()):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Deletions before the retention window were purged; full resync required",
+            )
+        query = query.where(Tombstone.deleted_at > deleted_since)
+
+    return _sync_page(
+        request,
+        response,
+        session,
+        [*SYNCED_TABLES, Tombstone.__tablename__],
+        query,
+        [Tombstone.deleted_at, Tombstone.id],
+        TombstoneResponse,
+        cursor,
+        limit,
+    )
+
+
+@router.post("/push", response_model=PushResponse)
+def push_changes(payload: PushRequest, session: Session = Depends(get_session)):
+    results = apply_push(session, payload.operations)
+    session.commit()
+    return {"results": results}
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Replay changes after this sequence number"),
+    last_event_id: int | None = Header(None, alias="Last-Event-ID", ge=0),
+    session: Session = Depends(get_session),
+):
+    """Push change-log entries as Server-Sent Events as soon as writes commit.
+
+    Each event carries the change's ``seq`` as its id, so a reconnecting client
+    resumes from ``Last-Event-ID`` (or ``since``) without missing anything.
+    """
+    events = change_events(
+        session,
+        last_event_id if last_event_id is not None else since,
+        settings.sse_heartbeat_seconds,
+        request.is_disconnected,
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,32 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 
 from database import get_session
 from middleware import verify_api_key
-from models import SubTask, Task
-from schemas import SubTaskResponse, TaskCreate, TaskResponse, TaskUpdate, TaskWithSubTasks
-from utils import utcnow
+from models import SubTask, Task, TaskOccurrence
+from schemas import (
+    SubTaskCreate,
+    SubTaskResponse,
+    TaskBatchDeleteRequest,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskCreate,
+    TaskListItem,
+    TaskOccurrenceResponse,
+    TaskResponse,
+    TaskUpdate,
+    TaskWithSubTasks,
+)
+from services import (
+    INCLUDE_SCHEMAS,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    TaskInclude,
+    batch,
+    conditional_get,
+    get_task_occurrences,
+    include_subtasks,
+    keyset_page,
+    keyset_query,
+    limit_stream,
+    mutations,
+    rule_cache_stats,
+    search_tasks,
+    stream_ndjson,
+    subtask_expander,
+    wants_ndjson,
+)
+from utils import to_naive_utc
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"], dependencies=[Depends(verify_api_key)])
 
+MAX_OCCURRENCE_WINDOW_DAYS = 366
+
 
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 def create_task(task_data: TaskCreate, session: Session = Depends(get_session)):
-    task = Task(**task_data.model_dump())
-    session.add(task)
+    task = mutations.create_task(session, task_data)
     session.commit()
     session.refresh(task)
     return task
 
 
-@router.get("", response_model=list[TaskResponse])
+@router.get("", response_model=list[TaskListItem])
 def get_tasks(
+    request: Request,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
     category_id: int | None = None,
     is_completed: bool | None = None,
+    include: TaskInclude | None = Query(
+        None, description="Embed each task's subtasks, or only their completion counts"
+    ),
     session: Session = Depends(get_session),
 ):
+    if skip and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either skip or cursor, not both"
+        )
+
+    tables = [Task.__tablename__] + ([SubTask.__tablename__] if include else [])
+    if not_modified := conditional_get(request, response, session, tables):
+        return not_modified
+
     query = select(Task)
 
     if category_id is not None:
@@ -35,10 +84,125 @@ def get_tasks(
     if is_completed is not None:
         query = query.where(Task.is_completed == is_completed)
 
-    query = query.offset(skip).limit(limit).order_by(Task.created_at.desc())
+    columns = [Task.created_at, Task.id]
+
+    if wants_ndjson(request):
+        query = keyset_query(query, columns, cursor, descending=True).offset(skip)
+        return stream_ndjson(
+            session,
+            limit_stream(request, query, limit),
+            INCLUDE_SCHEMAS[include],
+            headers={"ETag": response.headers["ETag"]},
+            expand=subtask_expander(session, include),
+        )
+
+    if skip:
+        # Offset paging is kept for existing clients; cursors cost the same at any depth.
+        query = keyset_query(query, columns, None, descending=True).offset(skip)
+        return include_subtasks(session, session.exec(query.limit(limit)).all(), include)
+
+    tasks, next_cursor = keyset_page(session, query, columns, cursor, limit, descending=True)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return include_subtasks(session, tasks, include)
+
+
+@router.get("/search", response_model=list[TaskResponse])
+def search(
+    request: Request,
+    response: Response,
+    q: str = Query(
+        min_length=1, max_length=200, description="Words to find; the last may be partial"
+    ),
+    category_id: int | None = None,
+    is_completed: bool | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_session),
+):
+    """Full-text search over task titles, descriptions and notes, best match first."""
+    if not_modified := conditional_get(request, response, session, [Task.__tablename__]):
+        return not_modified
+
+    return search_tasks(session, q, category_id, is_completed, limit)
+
+
+@router.get("/occurrences", response_model=list[TaskOccurrenceResponse])
+def get_occurrences(
+    request: Request,
+    response: Response,
+    start: datetime,
+    end: datetime,
+    category_id: int | None = None,
+    limit_per_task: int = Query(default=100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+):
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start"
+        )
+    if (end - start).days >= MAX_OCCURRENCE_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window cannot exceed {MAX_OCCURRENCE_WINDOW_DAYS} days",
+        )
+
+    tables = [Task.__tablename__, TaskOccurrence.__tablename__]
+    if not_modified := conditional_get(request, response, session, tables):
+        return not_modified
+
+    return get_task_occurrences(session, start, end, category_id, limit_per_task)
+
+
+@router.put("/occurrences/{occurrence_id}", response_model=TaskOccurrenceResponse)
+def update_occurrence(
+    occurrence_id: int, is_completed: bool, session: Session = Depends(get_session)
+):
+    occurrence = session.get(TaskOccurrence, occurrence_id)
+    if not occurrence:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Occurrence not found")
+
+    mutations.update_occurrence(session, occurrence, is_completed)
+    session.commit()
+    session.refresh(occurrence)
+    task = session.get(Task, occurrence.task_id)
+    return TaskOccurrenceResponse(
+        occurrence_id=occurrence.id,
+        task_id=task.id,
+        title=task.title,
+        category_id=task.category_id,
+        priority=task.priority,
+        occurs_at=occurrence.occurs_at,
+        is_completed=occurrence.is_completed,
+    )
+
+
+@router.post("/batch", response_model=TaskBatchResponse)
+def create_tasks(payload: TaskBatchRequest, session: Session = Depends(get_session)):
+    """Create many tasks with one INSERT. Invalid items are reported and skipped."""
+    results = batch.create_tasks(session, payload.tasks)
+    session.commit()
+    return {"results": results}
+
+
+@router.put("/batch", response_model=TaskBatchResponse)
+def update_tasks(payload: TaskBatchRequest, session: Session = Depends(get_session)):
+    """Update many tasks; each item is a ``TaskUpdate`` plus the ``id`` it applies to."""
+    results = batch.update_tasks(session, payload.tasks)
+    session.commit()
+    return {"results": results}
 
-    tasks = session.exec(query).all()
-    return tasks
+
+@router.post("/batch/delete", response_model=TaskBatchResponse)
+def delete_tasks(payload: TaskBatchDeleteRequest, session: Session = Depends(get_session)):
+    results = batch.delete_tasks(session, payload.ids)
+    session.commit()
+    return {"results": results}
+
+
+@router.get("/recurrence/cache-stats")
+def get_recurrence_cache_stats():
+    return rule_cache_stats()
 
 
 @router.get("/{task_id}", response_model=TaskWithSubTasks)
@@ -61,19 +225,7 @@ def update_task(task_id: int, task_data: TaskUpdate, session: Session = Depends(
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    update_data = task_data.model_dump(exclude_unset=True)
-
-    if "is_completed" in update_data:
-        if update_data["is_completed"] and not task.is_completed:
-            task.completed_at = utcnow()
-        elif not update_data["is_completed"] and task.is_completed:
-            task.completed_at = None
-
-    for field, value in update_data.items():
-        setattr(task, field, value)
-
-    task.updated_at = utcnow()
-    session.add(task)
+    mutations.update_task(session, task, task_data.model_dump(exclude_unset=True))
     session.commit()
     session.refresh(task)
     return task
@@ -85,23 +237,18 @@ def delete_task(task_id: int, session: Session = Depends(get_session)):
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    session.exec(select(SubTask).where(SubTask.task_id == task_id)).all()
-    for subtask in session.exec(select(SubTask).where(SubTask.task_id == task_id)).all():
-        session.delete(subtask)
-
-    session.delete(task)
+    mutations.delete_task(session, task)
     session.commit()
     return None
 
 
 @router.post("/{task_id}/subtasks", response_model=SubTaskResponse, status_code=status.HTTP_201_CREATED)
-def create_subtask(task_id: int, title: str, session: Session = Depends(get_session)):
-    task = session.get(Task, task_id)
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-
-    subtask = SubTask(task_id=task_id, title=title)
-    session.add(subtask)
+def create_subtask(
+    task_id: int,
+    title: str = Query(min_length=1, max_length=255),
+    session: Session = Depends(get_session),
+):
+    subtask = mutations.create_subtask(session, SubTaskCreate(task_id=task_id, title=title))
     session.commit()
     session.refresh(subtask)
     return subtask
@@ -129,15 +276,15 @@ def update_subtask(
     if not subtask:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SubTask not found")
 
+    update_data = {}
     if is_completed is not None:
-        subtask.is_completed = is_completed
+        update_data["is_completed"] = is_completed
     if title is not None:
-        subtask.title = title
+        update_data["title"] = title
     if order is not None:
-        subtask.order = order
+        update_data["order"] = order
 
-    subtask.updated_at = utcnow()
-    session.add(subtask)
+    mutations.update_subtask(session, subtask, update_data)
     session.commit()
     session.refresh(subtask)
     return subtask
@@ -149,6 +296,6 @@ def delete_subtask(subtask_id: int, session: Session = Depends(get_session)):
     if not subtask:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SubTask not found")
 
-    session.delete(subtask)
+    mutations.delete_subtask(session, subtask)
     session.commit()
     return None
@@ -1,13 +1,23 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 
 from database import get_session
 from middleware import verify_api_key
 from models import TimeBlock
 from schemas import TimeBlockCreate, TimeBlockResponse, TimeBlockUpdate
-from utils import utcnow
+from services import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    conditional_get,
+    keyset_page,
+    keyset_query,
+    limit_stream,
+    mutations,
+    stream_ndjson,
+    wants_ndjson,
+)
 
 router = APIRouter(
     prefix="/api/time-blocks", tags=["time-blocks"], dependencies=[Depends(verify_api_key)]
@@ -16,8 +26,7 @@ router = APIRouter(
 
 @router.post("", response_model=TimeBlockResponse, status_code=status.HTTP_201_CREATED)
 def create_time_block(block_data: TimeBlockCreate, session: Session = Depends(get_session)):
-    time_block = TimeBlock(**block_data.model_dump())
-    session.add(time_block)
+    time_block = mutations.create_time_block(session, block_data)
     session.commit()
     session.refresh(time_block)
     return time_block
@@ -25,13 +34,24 @@ def create_time_block(block_data: TimeBlockCreate, session: Session = Depends(ge
 
 @router.get("", response_model=list[TimeBlockResponse])
 def get_time_blocks(
+    request: Request,
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="Continuation cursor from X-Next-Cursor"),
     task_id: int | None = None,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
     session: Session = Depends(get_session),
 ):
+    if skip and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either skip or cursor, not both"
+        )
+
+    if not_modified := conditional_get(request, response, session, [TimeBlock.__tablename__]):
+        return not_modified
+
     query = select(TimeBlock)
 
     if task_id is not None:
@@ -43,9 +63,24 @@ def get_time_blocks(
     if end_date is not None:
         query = query.where(TimeBlock.end_time <= end_date)
 
-    query = query.offset(skip).limit(limit).order_by(TimeBlock.start_time.desc())
+    columns = [TimeBlock.start_time, TimeBlock.id]
+
+    if wants_ndjson(request):
+        query = keyset_query(query, columns, cursor, descending=True).offset(skip)
+        return stream_ndjson(
+            session,
+            limit_stream(request, query, limit),
+            TimeBlockResponse,
+            headers={"ETag": response.headers["ETag"]},
+        )
+
+    if skip:
+        query = keyset_query(query, columns, None, descending=True).offset(skip)
+        return session.exec(query.limit(limit)).all()
 
-    time_blocks = session.exec(query).all()
+    time_blocks, next_cursor = keyset_page(session, query, columns, cursor, limit, descending=True)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return time_blocks
 
 
@@ -65,34 +100,7 @@ def update_time_block(
     if not time_block:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Time block not found")
 
-    update_data = block_data.model_dump(exclude_unset=True)
-
-    if "start_time" in update_data and "end_time" not in update_data:
-        if update_data["start_time"] >= time_block.end_time:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="start_time must be before end_time",
-            )
-
-    if "end_time" in update_data and "start_time" not in update_data:
-        if update_data["end_time"] <= time_block.start_time:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="end_time must be after start_time",
-            )
-
-    if "start_time" in update_data and "end_time" in update_data:
-        if update_data["start_time"] >= update_data["end_time"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="start_time must be before end_time",
-            )
-
-    for field, value in update_data.items():
-        setattr(time_block, field, value)
-
-    time_block.updated_at = utcnow()
-    session.add(time_block)
+    mutations.update_time_block(session, time_block, block_data.model_dump(exclude_unset=True))
     session.commit()
     session.refresh(time_block)
     return time_block
@@ -104,6 +112,6 @@ def delete_time_block(block_id: int, session: Session = Depends(get_session)):
     if not time_block:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Time block not found")
 
-    session.delete(time_block)
+    mutations.delete_time_block(session, time_block)
     session.commit()
     return None
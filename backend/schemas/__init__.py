@@ -1,7 +1,34 @@
 from schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
-from schemas.productivity import ProductivitySummary, CategoryProductivity
+from schemas.productivity import (
+    CategoryProductivity,
+    ProductivityPeriod,
+    ProductivityRange,
+    ProductivitySummary,
+)
 from schemas.subtask import SubTaskCreate, SubTaskResponse, SubTaskUpdate
-from schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskWithSubTasks
+from schemas.sync import (
+    ChangeEntry,
+    ChangesResponse,
+    PushOperation,
+    PushRequest,
+    PushResponse,
+    PushResult,
+    TombstoneResponse,
+)
+from schemas.task import (
+    TaskBatchDeleteRequest,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskBatchResult,
+    TaskBatchUpdateItem,
+    TaskCreate,
+    TaskListItem,
+    TaskOccurrenceResponse,
+    TaskResponse,
+    TaskUpdate,
+    TaskWithSubTaskCounts,
+    TaskWithSubTasks,
+)
 from schemas.time_block import TimeBlockCreate, TimeBlockResponse, TimeBlockUpdate
 
 __all__ = [
@@ -9,6 +36,14 @@ __all__ = [
     "TaskUpdate",
     "TaskResponse",
     "TaskWithSubTasks",
+    "TaskWithSubTaskCounts",
+    "TaskListItem",
+    "TaskOccurrenceResponse",
+    "TaskBatchRequest",
+    "TaskBatchUpdateItem",
+    "TaskBatchDeleteRequest",
+    "TaskBatchResult",
+    "TaskBatchResponse",
     "SubTaskCreate",
     "SubTaskUpdate",
     "SubTaskResponse",
@@ -20,4 +55,13 @@ __all__ = [
     "TimeBlockResponse",
     "ProductivitySummary",
     "CategoryProductivity",
+    "ProductivityPeriod",
+    "ProductivityRange",
+    "ChangeEntry",
+    "ChangesResponse",
+    "TombstoneResponse",
+    "PushOperation",
+    "PushRequest",
+    "PushResult",
+    "PushResponse",
 ]
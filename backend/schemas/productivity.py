@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Literal
 
 from pydantic import BaseModel
 
@@ -17,3 +18,19 @@ class ProductivitySummary(BaseModel):
     total_tasks_completed: int
     total_time_spent: int
     categories: list[CategoryProductivity]
+
+
+class ProductivityPeriod(BaseModel):
+    start: date
+    end: date
+    score: float
+    tasks_completed: int
+    time_spent: int
+    categories: list[CategoryProductivity]
+
+
+class ProductivityRange(BaseModel):
+    start: date
+    end: date
+    granularity: Literal["day", "week", "month"]
+    periods: list[ProductivityPeriod]
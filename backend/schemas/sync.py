@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+EntityType = Literal["task", "subtask", "category", "time_block"]
+Operation = Literal["create", "update", "delete"]
+
+
+class ChangeEntry(BaseModel):
+    seq: int
+    entity_type: EntityType
+    entity_id: int
+    operation: Operation
+    changed_at: datetime
+    data: dict[str, Any] | None = None
+
+
+class TombstoneResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    entity_type: EntityType
+    entity_id: int
+    deleted_at: datetime
+
+
+class ChangesResponse(BaseModel):
+    changes: list[ChangeEntry]
+    next_since: int
+    has_more: bool
+
+
+class PushOperation(BaseModel):
+    op: Operation
+    entity_type: EntityType
+    id: int | str | None = Field(
+        default=None, description="Server id, or the temp_id of a create earlier in the batch"
+    )
+    temp_id: str | None = Field(default=None, max_length=100)
+    data: dict[str, Any] = {}
+
+
+class PushRequest(BaseModel):
+    operations: list[PushOperation] = Field(max_length=1000)
+
+
+class PushResult(BaseModel):
+    index: int
+    op: Operation
+    entity_type: EntityType
+    temp_id: str | None
+    id: int | None
+    status_code: int
+    error: str | None
+
+
+class PushResponse(BaseModel):
+    results: list[PushResult]
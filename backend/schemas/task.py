@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -40,10 +41,53 @@ class TaskResponse(TaskBase):
     updated_at: datetime
 
 
+class TaskOccurrenceResponse(BaseModel):
+    occurrence_id: int | None
+    task_id: int
+    title: str
+    category_id: int | None
+    priority: int
+    occurs_at: datetime
+    is_completed: bool
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBatchRequest(BaseModel):
+    tasks: list[dict[str, Any]] = Field(max_length=1000)
+
+
+class TaskBatchDeleteRequest(BaseModel):
+    ids: list[int] = Field(max_length=1000)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    id: int | None
+    status_code: int
+    error: str | None
+
+
+class TaskBatchResponse(BaseModel):
+    results: list[TaskBatchResult]
+
+
 class TaskWithSubTasks(TaskResponse):
     subtasks: list["SubTaskResponse"] = []
 
 
+class TaskWithSubTaskCounts(TaskResponse):
+    subtask_count: int = 0
+    completed_subtask_count: int = 0
+
+
+# List responses are plain tasks unless ``include`` asks for more. TaskResponse
+# comes first so tasks read from the database don't pick up empty extras.
+TaskListItem = TaskResponse | TaskWithSubTasks | TaskWithSubTaskCounts
+
+
 from schemas.subtask import SubTaskResponse
 
 TaskWithSubTasks.model_rebuild()
@@ -1,9 +1,85 @@
-from services.productivity import calculate_daily_score, get_productivity_summary
-from services.recurring import expand_recurring_task, get_next_occurrence
+from services.changes import get_changes, purge_tombstones, record_change, tombstone_cutoff
+from services.events import change_broker, change_events
+from services.includes import (
+    INCLUDE_SCHEMAS,
+    TaskInclude,
+    include_subtasks,
+    subtask_expander,
+)
+from services.occurrences import (
+    get_task_occurrences,
+    occurrence_cache,
+    roll_forward_occurrences,
+)
+from services.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page, keyset_query
+from services.productivity import (
+    aggregate_productivity,
+    calculate_daily_score,
+    get_category_productivity,
+    get_productivity_range,
+    get_productivity_summary,
+)
+from services.push import apply_push
+from services.recurring import (
+    expand_recurring_task,
+    get_next_occurrence,
+    occurrences_between,
+    rule_cache_stats,
+)
+from services.reminders import reminder_events, reminder_scheduler
+from services.rollups import (
+    PRODUCTIVITY_TABLES,
+    get_cached_summary,
+    get_rollup_summary,
+    mark_dates_dirty,
+    peek_cached_summary,
+    summary_cache,
+)
+from services.search import match_query, search_tasks
+from services.streaming import NDJSON_MEDIA_TYPE, limit_stream, stream_ndjson, wants_ndjson
+from services.versions import conditional_get
 
 __all__ = [
     "expand_recurring_task",
     "get_next_occurrence",
+    "occurrences_between",
+    "rule_cache_stats",
+    "TaskInclude",
+    "INCLUDE_SCHEMAS",
+    "include_subtasks",
+    "subtask_expander",
+    "get_task_occurrences",
+    "occurrence_cache",
+    "roll_forward_occurrences",
     "calculate_daily_score",
     "get_productivity_summary",
+    "get_productivity_range",
+    "get_category_productivity",
+    "aggregate_productivity",
+    "record_change",
+    "get_changes",
+    "apply_push",
+    "purge_tombstones",
+    "tombstone_cutoff",
+    "keyset_page",
+    "NEXT_CURSOR_HEADER",
+    "MAX_PAGE_SIZE",
+    "keyset_query",
+    "search_tasks",
+    "match_query",
+    "NDJSON_MEDIA_TYPE",
+    "limit_stream",
+    "stream_ndjson",
+    "wants_ndjson",
+    "conditional_get",
+    "change_broker",
+    "change_events",
+    "get_rollup_summary",
+    "get_cached_summary",
+    "peek_cached_summary",
+    "summary_cache",
+    "PRODUCTIVITY_TABLES",
+    "mark_dates_dirty",
+    "reminder_events",
+    "reminder_scheduler",
 ]
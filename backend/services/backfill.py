@@ -0,0 +1,170 @@
+import json
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from services.productivity import get_productivity_range, store_productivity_rollups
+from services.rollups import productivity_versions, summary_cache
+
+DEFAULT_CHUNK_DAYS = 31
+
+ProgressCallback = Callable[[int, int, date, date], None]
+
+_worker_engine: Engine | None = None
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def date_chunks(start: date, end: date, chunk_days: int) -> list[tuple[date, date]]:
+    """Split ``start``..``end`` (inclusive) into consecutive chunks of ``chunk_days``."""
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_engine
+    _worker_engine = create_engine(database_url)
+
+
+def _compute_chunk(chunk_start: date, chunk_end: date) -> tuple[tuple, list[dict]]:
+    with Session(_worker_engine) as session:
+        versions = productivity_versions(session)
+        return versions, get_productivity_range(session, chunk_start, chunk_end)
+
+
+def store_chunk(
+    engine: Engine, chunk: tuple[date, date], computed: tuple[tuple, list[dict]] | None = None
+) -> list[dict]:
+    """Write the rollups of ``chunk`` in one transaction and return its summaries.
+
+    ``computed`` is a ``(versions, summaries)`` pair from ``_compute_chunk``. It
+    is stored only if ``productivity_versions`` has not moved since; otherwise,
+    or without it, the chunk is computed in the writing transaction. A request
+    that commits a time block or task for one of these dates after the compute
+    step therefore never has its fresher rollups overwritten with stale totals.
+    """
+    with Session(engine) as session:
+        if computed is not None and computed[0] == productivity_versions(session):
+            summaries = computed[1]
+        else:
+            summaries = get_productivity_range(session, *chunk)
+        store_productivity_rollups(session, summaries)
+        session.commit()
+    summary_cache.invalidate(summary["date"] for summary in summaries)
+    return summaries
+
+
+class _Checkpoint:
+    """Chunks already written, persisted as JSON so an interrupted run can resume."""
+
+    def __init__(self, path: str | None, start: date, end: date, chunk_days: int):
+        self.path = Path(path) if path else None
+        self.key = {"start": start.isoformat(), "end": end.isoformat(), "chunk_days": chunk_days}
+        self.done: set[str] = set()
+
+        if self.path and self.path.exists():
+            saved = json.loads(self.path.read_text())
+            if {key: saved.get(key) for key in self.key} != self.key:
+                raise ValueError(
+                    f"Checkpoint {self.path} belongs to a different run; remove it to start over"
+                )
+            self.done = set(saved.get("done", []))
+
+    def is_done(self, chunk_start: date) -> bool:
+        return chunk_start.isoformat() in self.done
+
+    def mark_done(self, chunk_start: date) -> None:
+        self.done.add(chunk_start.isoformat())
+        if self.path:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps({**self.key, "done": sorted(self.done)}))
+            tmp.replace(self.path)
+
+    def clear(self) -> None:
+        if self.path and self.path.exists():
+            self.path.unlink()
+
+
+def recompute_productivity(
+    engine: Engine,
+    start: date,
+    end: date,
+    workers: int = 1,
+    chunk_days: int = DEFAULT_CHUNK_DAYS,
+    checkpoint: str | None = None,
+    progress: ProgressCallback | None = None,
+) -> int:
+    """Recompute the stored productivity rollups for every date in ``start``..``end``.
+
+    The range is split into chunks that are computed independently, in a pool of
+    ``workers`` processes when more than one is requested. Each finished chunk is
+    written by this process with ``store_chunk``, so SQLite only ever sees one
+    writer and writes made since a chunk was computed are not lost. With
+    ``checkpoint`` set, written chunks are recorded there and a rerun with the
+    same arguments skips them. Returns the number of days recomputed.
+    """
+    if end < start:
+        raise ValueError("end must not be before start")
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+
+    state = _Checkpoint(checkpoint, start, end, chunk_days)
+    chunks = date_chunks(start, end, chunk_days)
+    pending = [chunk for chunk in chunks if not state.is_done(chunk[0])]
+    completed = len(chunks) - len(pending)
+    days = 0
+
+    def write(chunk: tuple[date, date], computed: tuple | None = None) -> None:
+        nonlocal completed, days
+        summaries = store_chunk(engine, chunk, computed)
+        state.mark_done(chunk[0])
+        completed += 1
+        days += len(summaries)
+        if progress:
+            progress(completed, len(chunks), *chunk)
+
+    if workers > 1 and len(pending) > 1:
+        database_url = engine.url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            initializer=_init_worker,
+            initargs=(database_url,),
+        ) as pool:
+            futures = {pool.submit(_compute_chunk, *chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                write(futures[future], future.result())
+    else:
+        for chunk in pending:
+            write(chunk)
+
+    state.clear()
+    return days
+
+
+def run_scheduled_recompute(engine: Engine, event: dict | None = None) -> dict:
+    """Recompute rollups for a scheduled job.
+
+    ``event`` may carry ``start`` and ``end`` ISO dates; by default the last
+    ``days`` days (7 unless given) up to today are recomputed.
+    """
+    event = event or {}
+    end = date.fromisoformat(event["end"]) if event.get("end") else date.today()
+    if event.get("start"):
+        start = date.fromisoformat(event["start"])
+    else:
+        start = end - timedelta(days=int(event.get("days", 7)) - 1)
+
+    days = recompute_productivity(engine, start, end, workers=int(event.get("workers", 1)))
+    return {"start": start.isoformat(), "end": end.isoformat(), "days": days}
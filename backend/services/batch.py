@@ -0,0 +1,234 @@
+from fastapi import status
+from pydantic import ValidationError
+from sqlalchemy import bindparam, case, delete, insert, null, select, update
+from sqlmodel import Session
+
+from models import SubTask, Task
+from schemas import TaskBatchUpdateItem, TaskCreate
+from services.changes import record_changes
+from services.occurrences import delete_task_occurrences, refresh_occurrences
+from services.push import validation_detail
+from services.reminders import queue_reminder, reminder_for
+from services.rollups import TASK_ROLLUP_FIELDS, mark_dates_dirty, task_block_dates
+from utils import utcnow
+
+# Set-based counterparts of the task write paths in ``mutations``. Each batch
+# costs a fixed number of statements however many tasks it holds. The
+# statements run on the table, not through the unit of work, so the change
+# log, rollups, occurrences and reminders the ORM listeners and mutations keep
+# current are maintained here explicitly. None of these commit.
+
+tasks_table = Task.__table__
+subtasks_table = SubTask.__table__
+
+# Columns read before and after a batch to work out what it changed.
+SNAPSHOT_COLUMNS = (
+    tasks_table.c.id,
+    tasks_table.c.title,
+    tasks_table.c.due_date,
+    tasks_table.c.priority,
+    tasks_table.c.recurrence_rule,
+    tasks_table.c.is_completed,
+    tasks_table.c.completed_at,
+    tasks_table.c.category_id,
+    tasks_table.c.reminder_time,
+    tasks_table.c.created_at,
+)
+
+NOT_FOUND = "Task not found"
+
+
+def _result(index: int, task_id: int | None = None, status_code: int = status.HTTP_200_OK):
+    return {"index": index, "id": task_id, "status_code": status_code, "error": None}
+
+
+def _validate(schema, items: list[dict], results: list) -> list:
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            results[index] = {
+                **_result(index, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY),
+                "error": validation_detail(exc),
+            }
+    return valid
+
+
+def _snapshots(session: Session, task_ids) -> dict:
+    rows = session.execute(
+        select(*SNAPSHOT_COLUMNS).where(tasks_table.c.id.in_(list(task_ids)))
+    ).all()
+    return {row.id: row for row in rows}
+
+
+def _completed_dates(*rows) -> set:
+    return {row.completed_at.date() for row in rows if row.completed_at is not None}
+
+
+def _rescheduled(old, new) -> bool:
+    if old is None:
+        return bool(new.recurrence_rule)
+    return (old.recurrence_rule, old.due_date) != (new.recurrence_rule, new.due_date)
+
+
+def _after_write(session: Session, before: dict, after: dict) -> None:
+    """Bring everything derived from tasks up to date with ``before`` -> ``after``.
+
+    A task missing from ``before`` was created, one missing from ``after``
+    was deleted.
+    """
+    dates = set()
+    moved = set()
+    rescheduled = []
+    for task_id in before.keys() | after.keys():
+        old, new = before.get(task_id), after.get(task_id)
+        if (
+            old is None
+            or new is None
+            or any(getattr(old, field) != getattr(new, field) for field in TASK_ROLLUP_FIELDS)
+        ):
+            dates |= _completed_dates(*(row for row in (old, new) if row is not None))
+        # Created tasks can adopt a deleted task's blocks through a reused id.
+        if old is None or new is None or old.category_id != new.category_id:
+            moved.add(task_id)
+        if new is not None and _rescheduled(old, new):
+            rescheduled.append(new)
+        queue_reminder(session, task_id, reminder_for(new) if new is not None else None)
+
+    mark_dates_dirty(session, dates | task_block_dates(session, moved))
+    if rescheduled:
+        refresh_occurrences(session, rescheduled)
+
+
+def create_tasks(session: Session, items: list[dict]) -> list[dict]:
+    """Validate ``items`` as ``TaskCreate`` and insert the valid ones in one statement.
+
+    Returns one result per item, in order, with the new id or the validation error.
+    """
+    results = [None] * len(items)
+    valid = _validate(TaskCreate, items, results)
+    if not valid:
+        return results
+
+    now = utcnow()
+    rows = [
+        {
+            **task_data.model_dump(),
+            "is_completed": False,
+            "completed_at": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for _, task_data in valid
+    ]
+    # RETURNING comes back in no particular order, but rows take ascending ids
+    # in the order they are inserted. Asking SQLAlchemy to sort by parameter
+    # order instead would make it insert one row per statement on SQLite.
+    task_ids = sorted(
+        session.execute(insert(tasks_table).returning(tasks_table.c.id), rows).scalars()
+    )
+
+    for (index, _), task_id in zip(valid, task_ids, strict=True):
+        results[index] = _result(index, task_id, status.HTTP_201_CREATED)
+    record_changes(session, "task", task_ids, "create")
+    _after_write(session, {}, _snapshots(session, task_ids))
+    return results
+
+
+def update_tasks(session: Session, items: list[dict]) -> list[dict]:
+    """Apply ``TaskUpdate`` payloads, each carrying the ``id`` it updates.
+
+    Payloads setting the same fields share one executemany ``UPDATE``, so a
+    batch costs one statement per distinct field set. ``completed_at`` follows
+    ``update_task``: it is stamped when a task becomes completed and cleared
+    when it is reopened, and left alone otherwise. Payloads for the same id are
+    merged in order.
+    """
+    results = [None] * len(items)
+    valid = _validate(TaskBatchUpdateItem, items, results)
+    before = _snapshots(session, {item.id for _, item in valid})
+
+    changes: dict[int, dict] = {}
+    for index, item in valid:
+        if item.id not in before:
+            results[index] = {
+                **_result(index, item.id, status.HTTP_404_NOT_FOUND),
+                "error": NOT_FOUND,
+            }
+            continue
+        changes.setdefault(item.id, {}).update(item.model_dump(exclude_unset=True, exclude={"id"}))
+        results[index] = _result(index, item.id)
+    if not changes:
+        return results
+
+    now = utcnow()
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for task_id, update_data in changes.items():
+        params = {f"new_{field}": value for field, value in update_data.items()}
+        groups.setdefault(tuple(sorted(update_data)), []).append(
+            {**params, "task_id": task_id, "now": now}
+        )
+
+    columns = tasks_table.c
+    for fields, params in groups.items():
+        values = {field: bindparam(f"new_{field}", type_=columns[field].type) for field in fields}
+        values["updated_at"] = bindparam("now", type_=columns.updated_at.type)
+        if "is_completed" in fields:
+            # SET expressions see the row as it was before the statement.
+            completed = bindparam("new_is_completed", type_=columns.is_completed.type)
+            values["completed_at"] = case(
+                (columns.is_completed == completed, columns.completed_at),
+                (completed, bindparam("now", type_=columns.completed_at.type)),
+                else_=null(),
+            )
+        statement = (
+            update(tasks_table).where(tasks_table.c.id == bindparam("task_id")).values(values)
+        )
+        session.execute(statement, params)
+
+    record_changes(session, "task", changes, "update")
+    _after_write(
+        session,
+        {task_id: before[task_id] for task_id in changes},
+        _snapshots(session, changes),
+    )
+    return results
+
+
+def delete_tasks(session: Session, task_ids: list[int]) -> list[dict]:
+    """Delete ``task_ids`` with their subtasks and occurrences.
+
+    An id that does not exist, or was already deleted earlier in the list,
+    gets a 404 result.
+    """
+    before = _snapshots(session, set(task_ids))
+    results = []
+    deleted: dict[int, object] = {}
+    for index, task_id in enumerate(task_ids):
+        if task_id not in before or task_id in deleted:
+            results.append(
+                {**_result(index, task_id, status.HTTP_404_NOT_FOUND), "error": NOT_FOUND}
+            )
+            continue
+        deleted[task_id] = before[task_id]
+        results.append(_result(index, task_id))
+    if not deleted:
+        return results
+
+    ids = list(deleted)
+    _after_write(session, deleted, {})
+    subtask_ids = (
+        session.execute(
+            delete(subtasks_table)
+            .where(subtasks_table.c.task_id.in_(ids))
+            .returning(subtasks_table.c.id)
+        )
+        .scalars()
+        .all()
+    )
+    record_changes(session, "subtask", subtask_ids, "delete")
+    delete_task_occurrences(session, ids)
+    session.execute(delete(tasks_table).where(tasks_table.c.id.in_(ids)))
+    record_changes(session, "task", ids, "delete")
+    return results
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, delete, select
+
+from config import settings
+from models import Category, ChangeLog, SubTask, Task, TimeBlock, Tombstone
+from schemas import CategoryResponse, SubTaskResponse, TaskResponse, TimeBlockResponse
+from services.events import queue_change_events
+from services.versions import mark_table_dirty
+from utils import utcnow
+
+ENTITY_MODELS = {
+    "task": (Task, TaskResponse),
+    "subtask": (SubTask, SubTaskResponse),
+    "category": (Category, CategoryResponse),
+    "time_block": (TimeBlock, TimeBlockResponse),
+}
+
+
+def record_change(session: Session, entity_type: str, entity_id: int, operation: str) -> ChangeLog:
+    """Append a write to the change log inside the caller's transaction."""
+    entry = ChangeLog(entity_type=entity_type, entity_id=entity_id, operation=operation)
+    session.add(entry)
+    mark_table_dirty(session, ENTITY_MODELS[entity_type][0].__tablename__)
+    if operation == "delete":
+        session.add(
+            Tombstone(entity_type=entity_type, entity_id=entity_id, deleted_at=entry.changed_at)
+        )
+    return entry
+
+
+def record_changes(session: Session, entity_type: str, entity_ids, operation: str) -> None:
+    """``record_change`` for many entities, with one INSERT per table.
+
+    For writes that bypass the ORM: the entries are written immediately and
+    handed to the change stream directly, since no flush will see them.
+    """
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+    changed_at = utcnow()
+    seqs = session.execute(
+        insert(ChangeLog).returning(ChangeLog.seq, ChangeLog.entity_id),
+        [
+            {
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "operation": operation,
+                "changed_at": changed_at,
+            }
+            for entity_id in entity_ids
+        ],
+    ).all()
+    queue_change_events(
+        session,
+        [
+            ChangeLog(
+                seq=seq,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                operation=operation,
+                changed_at=changed_at,
+            )
+            for seq, entity_id in sorted(seqs)
+        ],
+    )
+    mark_table_dirty(session, ENTITY_MODELS[entity_type][0].__tablename__)
+    if operation == "delete":
+        session.execute(
+            insert(Tombstone),
+            [
+                {"entity_type": entity_type, "entity_id": entity_id, "deleted_at": changed_at}
+                for entity_id in entity_ids
+            ],
+        )
+
+
+def tombstone_cutoff():
+    return utcnow() - timedelta(days=settings.tombstone_retention_days)
+
+
+def purge_tombstones(session: Session) -> int:
+    """Delete tombstones older than the retention window and return how many went."""
+    result = session.exec(delete(Tombstone).where(Tombstone.deleted_at < tombstone_cutoff()))
+    if result.rowcount:
+        mark_table_dirty(session, Tombstone.__tablename__)
+    session.commit()
+    return result.rowcount
+
+
+def run_scheduled_purge(engine: Engine, event: dict | None = None) -> dict:
+    """Purge expired tombstones for a scheduled job."""
+    with Session(engine) as session:
+        return {"purged": purge_tombstones(session)}
+
+
+def get_changes(session: Session, since: int, limit: int) -> dict:
+    entries = session.exec(
+        select(ChangeLog).where(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit + 1)
+    ).all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    next_since = entries[-1].seq if entries else since
+
+    # Only the latest change per entity matters to a client replaying the page.
+    latest = {}
+    for entry in entries:
+        latest[(entry.entity_type, entry.entity_id)] = entry
+
+    ids_by_type = {}
+    for entity_type, entity_id in latest:
+        ids_by_type.setdefault(entity_type, []).append(entity_id)
+
+    rows = {}
+    for entity_type, ids in ids_by_type.items():
+        model, schema = ENTITY_MODELS[entity_type]
+        for row in session.exec(select(model).where(model.id.in_(ids))).all():
+            rows[(entity_type, row.id)] = schema.model_validate(row).model_dump()
+
+    changes = []
+    for entry in sorted(latest.values(), key=lambda e: e.seq):
+        key = (entry.entity_type, entry.entity_id)
+        changes.append(
+            {
+                "seq": entry.seq,
+                "entity_type": entry.entity_type,
+                "entity_id": entry.entity_id,
+                "operation": entry.operation,
+                "changed_at": entry.changed_at,
+                "data": rows.get(key) if entry.operation != "delete" else None,
+            }
+        )
+
+    return {"changes": changes, "next_since": next_since, "has_more": has_more}
@@ -0,0 +1,159 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from models import ChangeLog
+from utils import to_naive_utc
+
+FLUSHED_CHANGES_KEY = "flushed_changes"
+SUBSCRIBER_QUEUE_SIZE = 1000
+REPLAY_BATCH_SIZE = 500
+
+
+def _change_event(entry: ChangeLog) -> dict:
+    # Entries just written still hold the aware datetime they were created
+    # with; ones read back from the database are naive UTC. Emit the stored
+    # form so a change replayed after Last-Event-ID matches the live event.
+    return {
+        "seq": entry.seq,
+        "entity_type": entry.entity_type,
+        "entity_id": entry.entity_id,
+        "operation": entry.operation,
+        "changed_at": to_naive_utc(entry.changed_at).isoformat(),
+    }
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, change: dict) -> None:
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # A stalled client is cut loose; it resumes from Last-Event-ID.
+            self.overflowed = True
+
+
+class ChangeBroker:
+    """Fan committed changes out to in-process subscribers.
+
+    ``publish`` may be called from any thread (sync routes run in a thread
+    pool); delivery is handed to each subscriber's event loop.
+    """
+
+    def __init__(self):
+        self._subscribers: set[_Subscriber] = set()
+
+    def subscribe(self) -> _Subscriber:
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish(self, changes: list[dict]) -> None:
+        for subscriber in list(self._subscribers):
+            for change in changes:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.deliver, change)
+                except RuntimeError:
+                    self._subscribers.discard(subscriber)
+                    break
+
+
+change_broker = ChangeBroker()
+
+
+def queue_change_events(session: Session, entries) -> None:
+    """Publish change-log ``entries`` written outside the ORM once the session commits."""
+    changes = [_change_event(entry) for entry in entries]
+    if changes:
+        session.info.setdefault(FLUSHED_CHANGES_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_flushed_changes(session: Session, flush_context) -> None:
+    queue_change_events(session, [obj for obj in session.new if isinstance(obj, ChangeLog)])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop(FLUSHED_CHANGES_KEY, None)
+    if changes:
+        change_broker.publish(sorted(changes, key=lambda change: change["seq"]))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_flushed_changes(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(FLUSHED_CHANGES_KEY, None)
+
+
+def format_sse(data: dict, event_id: int | None = None, event_name: str = "change") -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_name}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _replay_batch(session: Session, since: int) -> list[dict]:
+    entries = session.exec(
+        select(ChangeLog)
+        .where(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(REPLAY_BATCH_SIZE)
+    ).all()
+    return [_change_event(entry) for entry in entries]
+
+
+async def change_events(
+    session: Session,
+    last_event_id: int,
+    heartbeat_seconds: float,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    broker: ChangeBroker = change_broker,
+) -> AsyncIterator[str]:
+    """Yield SSE frames: missed changes after ``last_event_id``, then live ones.
+
+    The subscription is opened before the replay query so nothing committed in
+    between is lost; sequence numbers de-duplicate the overlap.
+    """
+    subscriber = broker.subscribe()
+    last_seq = last_event_id
+    try:
+        yield f"retry: {int(heartbeat_seconds * 1000)}\n\n"
+
+        while True:
+            batch = await asyncio.to_thread(_replay_batch, session, last_seq)
+            for change in batch:
+                last_seq = change["seq"]
+                yield format_sse(change, change["seq"])
+            if len(batch) < REPLAY_BATCH_SIZE:
+                break
+        await asyncio.to_thread(session.close)
+
+        while not subscriber.overflowed:
+            try:
+                change = await asyncio.wait_for(subscriber.queue.get(), heartbeat_seconds)
+            except TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": heartbeat\n\n"
+                continue
+            if change["seq"] <= last_seq:
+                continue
+            last_seq = change["seq"]
+            yield format_sse(change, change["seq"])
+    finally:
+        broker.unsubscribe(subscriber)
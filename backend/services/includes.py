@@ -0,0 +1,80 @@
+from functools import partial
+from typing import Literal
+
+from sqlalchemy import case, func
+from sqlmodel import Session, select
+
+from models import SubTask
+from schemas import SubTaskResponse, TaskResponse, TaskWithSubTaskCounts, TaskWithSubTasks
+
+TaskInclude = Literal["subtasks", "subtask_counts"]
+
+INCLUDE_SCHEMAS = {
+    None: TaskResponse,
+    "subtasks": TaskWithSubTasks,
+    "subtask_counts": TaskWithSubTaskCounts,
+}
+
+
+def subtasks_by_task(session: Session, task_ids) -> dict[int, list[SubTask]]:
+    """The subtasks of ``task_ids`` in one query, grouped by task in ``order``."""
+    grouped: dict[int, list[SubTask]] = {}
+    if not task_ids:
+        return grouped
+    subtasks = session.exec(
+        select(SubTask)
+        .where(SubTask.task_id.in_(list(task_ids)))
+        .order_by(SubTask.order, SubTask.id)
+    )
+    for subtask in subtasks:
+        grouped.setdefault(subtask.task_id, []).append(subtask)
+    return grouped
+
+
+def subtask_counts(session: Session, task_ids) -> dict[int, tuple[int, int]]:
+    """``(total, completed)`` subtask counts of ``task_ids`` in one grouped query."""
+    if not task_ids:
+        return {}
+    rows = session.exec(
+        select(
+            SubTask.task_id,
+            func.count(),
+            func.sum(case((SubTask.is_completed, 1), else_=0)),
+        )
+        .where(SubTask.task_id.in_(list(task_ids)))
+        .group_by(SubTask.task_id)
+    )
+    return {task_id: (total, completed) for task_id, total, completed in rows}
+
+
+def include_subtasks(session: Session, tasks: list, include: TaskInclude | None) -> list:
+    """Return ``tasks`` with what ``include`` asks for, loaded for all of them at once."""
+    if include is None or not tasks:
+        return tasks
+    task_ids = [task.id for task in tasks]
+
+    if include == "subtasks":
+        grouped = subtasks_by_task(session, task_ids)
+        return [
+            TaskWithSubTasks(
+                **task.model_dump(),
+                subtasks=[SubTaskResponse.model_validate(st) for st in grouped.get(task.id, [])],
+            )
+            for task in tasks
+        ]
+
+    counts = subtask_counts(session, task_ids)
+    expanded = []
+    for task in tasks:
+        total, completed = counts.get(task.id, (0, 0))
+        expanded.append(
+            TaskWithSubTaskCounts(
+                **task.model_dump(), subtask_count=total, completed_subtask_count=completed
+            )
+        )
+    return expanded
+
+
+def subtask_expander(session: Session, include: TaskInclude | None):
+    """``include_subtasks`` for streaming one batch at a time, or ``None``."""
+    return partial(include_subtasks, session, include=include) if include else None
@@ -0,0 +1,56 @@
+from collections.abc import Hashable, Iterable
+from datetime import date, datetime, timedelta
+
+# Intervals are half-open ``(start, end)`` pairs: an interval ending at midnight
+# does not reach into the next day.
+Interval = tuple[datetime, datetime]
+
+_EPSILON = timedelta(microseconds=1)
+
+
+def clip(intervals: Iterable[Interval], window_start: datetime, window_end: datetime):
+    """Cut ``intervals`` to ``[window_start, window_end)``, dropping what falls outside."""
+    clipped = []
+    for start, end in intervals:
+        start, end = max(start, window_start), min(end, window_end)
+        if start < end:
+            clipped.append((start, end))
+    return clipped
+
+
+def merge(intervals: Iterable[Interval]) -> list[Interval]:
+    """Sort ``intervals`` and merge the ones that overlap or touch, in O(n log n)."""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def covered_minutes(intervals: Iterable[Interval]) -> float:
+    """Minutes covered by at least one interval, so overlaps are counted once."""
+    return sum((end - start for start, end in merge(intervals)), timedelta()).total_seconds() / 60
+
+
+def covered_minutes_by_key(keyed: Iterable[tuple[Hashable, datetime, datetime]]) -> dict:
+    """``covered_minutes`` per key, with keys in order of first appearance."""
+    groups: dict = {}
+    for key, start, end in keyed:
+        groups.setdefault(key, []).append((start, end))
+    return {key: covered_minutes(intervals) for key, intervals in groups.items()}
+
+
+def day_window(day: date) -> Interval:
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def days_spanned(start: datetime, end: datetime) -> list[date]:
+    """Every calendar day that ``[start, end)`` overlaps."""
+    if end <= start:
+        return []
+    first, last = start.date(), (end - _EPSILON).date()
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
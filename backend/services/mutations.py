@@ -0,0 +1,169 @@
+from fastapi import HTTPException, status
+from sqlmodel import Session, select
+
+from models import Category, SubTask, Task, TaskOccurrence, TimeBlock
+from schemas import CategoryCreate, SubTaskCreate, TaskCreate, TimeBlockCreate
+from services.changes import record_change
+from services.occurrences import delete_task_occurrences, refresh_task_occurrences
+from services.reminders import queue_reminder, reminder_for
+from services.versions import mark_table_dirty
+from utils import utcnow
+
+# Write paths shared by the REST routers and the batched sync push. None of
+# these commit: the caller owns the transaction so a whole batch can be applied
+# with a single commit.
+
+
+def create_task(session: Session, task_data: TaskCreate) -> Task:
+    task = Task(**task_data.model_dump())
+    session.add(task)
+    session.flush()
+    record_change(session, "task", task.id, "create")
+    if task.recurrence_rule:
+        refresh_task_occurrences(session, task)
+    queue_reminder(session, task.id, reminder_for(task))
+    return task
+
+
+def update_task(session: Session, task: Task, update_data: dict) -> Task:
+    if "is_completed" in update_data:
+        if update_data["is_completed"] and not task.is_completed:
+            task.completed_at = utcnow()
+        elif not update_data["is_completed"] and task.is_completed:
+            task.completed_at = None
+
+    schedule = (task.recurrence_rule, task.due_date)
+    for field, value in update_data.items():
+        setattr(task, field, value)
+
+    task.updated_at = utcnow()
+    session.add(task)
+    record_change(session, "task", task.id, "update")
+    if (task.recurrence_rule, task.due_date) != schedule:
+        refresh_task_occurrences(session, task)
+    queue_reminder(session, task.id, reminder_for(task))
+    return task
+
+
+def delete_task(session: Session, task: Task) -> None:
+    for subtask in session.exec(select(SubTask).where(SubTask.task_id == task.id)).all():
+        delete_subtask(session, subtask)
+    delete_task_occurrences(session, [task.id])
+
+    session.delete(task)
+    record_change(session, "task", task.id, "delete")
+    queue_reminder(session, task.id, None)
+
+
+def update_occurrence(
+    session: Session, occurrence: TaskOccurrence, is_completed: bool
+) -> TaskOccurrence:
+    if is_completed and not occurrence.is_completed:
+        occurrence.completed_at = utcnow()
+    elif not is_completed and occurrence.is_completed:
+        occurrence.completed_at = None
+
+    occurrence.is_completed = is_completed
+    occurrence.updated_at = utcnow()
+    session.add(occurrence)
+    mark_table_dirty(session, TaskOccurrence.__tablename__)
+    return occurrence
+
+
+def create_subtask(session: Session, subtask_data: SubTaskCreate) -> SubTask:
+    if not session.get(Task, subtask_data.task_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+
+    subtask = SubTask(**subtask_data.model_dump())
+    session.add(subtask)
+    session.flush()
+    record_change(session, "subtask", subtask.id, "create")
+    return subtask
+
+
+def update_subtask(session: Session, subtask: SubTask, update_data: dict) -> SubTask:
+    for field, value in update_data.items():
+        setattr(subtask, field, value)
+
+    subtask.updated_at = utcnow()
+    session.add(subtask)
+    record_change(session, "subtask", subtask.id, "update")
+    return subtask
+
+
+def delete_subtask(session: Session, subtask: SubTask) -> None:
+    session.delete(subtask)
+    record_change(session, "subtask", subtask.id, "delete")
+
+
+def create_category(session: Session, category_data: CategoryCreate) -> Category:
+    category = Category(**category_data.model_dump())
+    session.add(category)
+    session.flush()
+    record_change(session, "category", category.id, "create")
+    return category
+
+
+def update_category(session: Session, category: Category, update_data: dict) -> Category:
+    for field, value in update_data.items():
+        setattr(category, field, value)
+
+    category.updated_at = utcnow()
+    session.add(category)
+    record_change(session, "category", category.id, "update")
+    return category
+
+
+def delete_category(session: Session, category: Category) -> None:
+    if category.is_default:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot delete default category",
+        )
+
+    session.delete(category)
+    record_change(session, "category", category.id, "delete")
+
+
+def create_time_block(session: Session, block_data: TimeBlockCreate) -> TimeBlock:
+    time_block = TimeBlock(**block_data.model_dump())
+    session.add(time_block)
+    session.flush()
+    record_change(session, "time_block", time_block.id, "create")
+    return time_block
+
+
+def update_time_block(session: Session, time_block: TimeBlock, update_data: dict) -> TimeBlock:
+    if "start_time" in update_data and "end_time" not in update_data:
+        if update_data["start_time"] >= time_block.end_time:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_time must be before end_time",
+            )
+
+    if "end_time" in update_data and "start_time" not in update_data:
+        if update_data["end_time"] <= time_block.start_time:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_time must be after start_time",
+            )
+
+    if "start_time" in update_data and "end_time" in update_data:
+        if update_data["start_time"] >= update_data["end_time"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_time must be before end_time",
+            )
+
+    for field, value in update_data.items():
+        setattr(time_block, field, value)
+
+    time_block.updated_at = utcnow()
+    session.add(time_block)
+    record_change(session, "time_block", time_block.id, "update")
+    return time_block
+
+
+def delete_time_block(session: Session, time_block: TimeBlock) -> None:
+    session.delete(time_block)
+    record_change(session, "time_block", time_block.id, "delete")
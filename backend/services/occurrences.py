@@ -0,0 +1,399 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from operator import itemgetter
+
+from sqlalchemy import func, insert, or_
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, delete, select
+
+from config import settings
+from models import OccurrenceHorizon, Task, TaskOccurrence
+from services.cache import LRUCache
+from services.recurring import normalize_rule, occurrences_between, parse_recurrence_rule
+from services.versions import mark_table_dirty
+from utils import to_naive_utc, utcnow
+
+# Distinct series to expand in one call before a multi-worker job uses a pool.
+PARALLEL_THRESHOLD = 256
+# Occurrences stored per task in one generation; a denser rule is stored up to
+# there and the roll-forward job continues from the last one.
+MAX_STORED_OCCURRENCES = 5000
+
+_EPSILON = timedelta(microseconds=1)
+
+# A series is a rule string plus the start it runs from: tasks sharing both
+# share their occurrences.
+Series = tuple[str, datetime | None]
+
+# Occurrences by (series, window, limit). Expansion is a pure function of the
+# key, so entries never go stale and are only ever evicted.
+occurrence_cache = LRUCache(maxsize=settings.occurrence_cache_size)
+
+
+def task_series(task) -> Series:
+    key = normalize_rule(task.recurrence_rule)
+    # A rule without DTSTART runs from the task's due date, or its creation.
+    anchor = None if "DTSTART" in key else task.due_date or task.created_at
+    return key, anchor and to_naive_utc(anchor)
+
+
+def expand_series(series: Series, start: datetime, end: datetime, limit: int) -> list[datetime]:
+    """Occurrences of ``series`` in ``[start, end)``, at most ``limit``; none for invalid rules."""
+    rule_string, anchor = series
+    rule = parse_recurrence_rule(rule_string, dtstart=anchor)
+    if not rule:
+        return []
+    try:
+        occurrences = occurrences_between(rule, start, end, limit)
+    except Exception:
+        return []
+    return [occurrence for occurrence in occurrences if occurrence < end]
+
+
+def _expand_batch(
+    batch: list[Series], start: datetime, end: datetime, limit: int
+) -> list[list[datetime]]:
+    return [expand_series(series, start, end, limit) for series in batch]
+
+
+def expand_many(
+    series: list[Series], start: datetime, end: datetime, limit: int, workers: int = 1
+) -> dict[Series, list[datetime]]:
+    """Expand each distinct series once, reusing cached windows.
+
+    When more than ``PARALLEL_THRESHOLD`` series miss the cache and ``workers``
+    is above 1, they are expanded in batches across a pool of that many
+    processes, started for this call and shut down before it returns. Only the
+    maintenance jobs pass ``workers``; requests always expand in this process.
+    """
+    expanded = {}
+    missing = []
+    for item in dict.fromkeys(series):
+        cached = occurrence_cache.get((item, start, end, limit))
+        if cached is None:
+            missing.append(item)
+        else:
+            expanded[item] = cached
+
+    if workers > 1 and len(missing) > PARALLEL_THRESHOLD:
+        size = -(-len(missing) // workers)
+        batches = [missing[offset : offset + size] for offset in range(0, len(missing), size)]
+        # Spawned, not forked, so workers don't inherit the engine's connections.
+        with ProcessPoolExecutor(max_workers=len(batches), mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(_expand_batch, batch, start, end, limit) for batch in batches]
+            results = [occurrences for future in futures for occurrences in future.result()]
+    else:
+        results = _expand_batch(missing, start, end, limit)
+
+    for item, occurrences in zip(missing, results, strict=True):
+        occurrence_cache.set((item, start, end, limit), occurrences)
+        expanded[item] = occurrences
+    return expanded
+
+
+def _today() -> datetime:
+    return datetime.combine(to_naive_utc(utcnow()).date(), datetime.min.time())
+
+
+def horizon_end() -> datetime:
+    """How far ahead occurrences are stored: ``OCCURRENCE_HORIZON_DAYS`` from today."""
+    return _today() + timedelta(days=settings.occurrence_horizon_days)
+
+
+def _materialize(
+    session: Session, windows: dict[int, tuple[Series, datetime, datetime]], workers: int = 1
+) -> dict[int, datetime]:
+    """Make the stored occurrences of each task match its series within its window.
+
+    ``windows`` maps task ids to ``(series, start, end)``. Rows the series still
+    produces are kept with their completion state, the others are deleted and
+    missing ones inserted. Returns how far each task's occurrences now reach,
+    which is short of ``end`` when ``MAX_STORED_OCCURRENCES`` cut it off.
+    """
+    if not windows:
+        return {}
+
+    groups: dict[tuple[datetime, datetime], list[tuple[int, Series]]] = {}
+    for task_id, (series, start, end) in windows.items():
+        groups.setdefault((start, end), []).append((task_id, series))
+
+    generated = {}
+    wanted = set()
+    for (start, end), members in groups.items():
+        expanded = expand_many(
+            [series for _, series in members], start, end, MAX_STORED_OCCURRENCES, workers
+        )
+        for task_id, series in members:
+            occurrences = expanded[series]
+            truncated = len(occurrences) >= MAX_STORED_OCCURRENCES
+            generated[task_id] = occurrences[-1] + _EPSILON if truncated else end
+            wanted.update((task_id, occurs_at) for occurs_at in occurrences)
+
+    query = select(TaskOccurrence.id, TaskOccurrence.task_id, TaskOccurrence.occurs_at).where(
+        TaskOccurrence.occurs_at >= min(start for _, start, _ in windows.values()),
+        TaskOccurrence.occurs_at < max(end for _, _, end in windows.values()),
+    )
+    if len(windows) <= 500:
+        query = query.where(TaskOccurrence.task_id.in_(list(windows)))
+
+    existing = set()
+    stale_ids = []
+    for occurrence_id, task_id, occurs_at in session.exec(query).all():
+        if task_id not in windows:
+            continue
+        _, start, end = windows[task_id]
+        if not start <= occurs_at < end:
+            continue
+        if (task_id, occurs_at) in wanted:
+            existing.add((task_id, occurs_at))
+        else:
+            stale_ids.append(occurrence_id)
+
+    if stale_ids:
+        session.exec(delete(TaskOccurrence).where(TaskOccurrence.id.in_(stale_ids)))
+    now = utcnow()
+    rows = [
+        {
+            "task_id": task_id,
+            "occurs_at": occurs_at,
+            "is_completed": False,
+            "completed_at": None,
+            "updated_at": now,
+        }
+        for task_id, occurs_at in sorted(wanted - existing)
+    ]
+    if rows:
+        session.execute(insert(TaskOccurrence), rows)
+    if stale_ids or rows:
+        mark_table_dirty(session, TaskOccurrence.__tablename__)
+    return generated
+
+
+def refresh_task_occurrences(session: Session, task: Task) -> None:
+    """Regenerate the stored occurrences of ``task`` from today on.
+
+    Called when its rule or due date changes. Past occurrences and their
+    completion state are left as they were.
+    """
+    refresh_occurrences(session, [task])
+
+
+def refresh_occurrences(session: Session, tasks) -> None:
+    """``refresh_task_occurrences`` for many tasks in a fixed number of statements."""
+    today = _today()
+    tasks = {task.id: task for task in tasks}
+    horizons = {
+        horizon.task_id: horizon
+        for horizon in session.exec(
+            select(OccurrenceHorizon).where(OccurrenceHorizon.task_id.in_(list(tasks)))
+        ).all()
+    }
+
+    cleared = [task_id for task_id, task in tasks.items() if not task.recurrence_rule]
+    if cleared:
+        result = session.exec(
+            delete(TaskOccurrence).where(
+                TaskOccurrence.task_id.in_(cleared), TaskOccurrence.occurs_at >= today
+            )
+        )
+        if result.rowcount:
+            mark_table_dirty(session, TaskOccurrence.__tablename__)
+        for task_id in cleared:
+            if task_id in horizons:
+                session.delete(horizons.pop(task_id))
+
+    windows = {}
+    for task_id, task in tasks.items():
+        if not task.recurrence_rule:
+            continue
+        horizon = horizons.get(task_id)
+        if horizon is None:
+            start = today - timedelta(days=settings.occurrence_lookback_days)
+            horizon = horizons[task_id] = OccurrenceHorizon(
+                task_id=task_id, generated_from=start, generated_until=start
+            )
+        else:
+            start = max(today, horizon.generated_from)
+        windows[task_id] = (task_series(task), start, max(horizon.generated_until, horizon_end()))
+
+    if windows:
+        generated = _materialize(session, windows)
+        for task_id in windows:
+            horizons[task_id].generated_until = generated[task_id]
+            session.add(horizons[task_id])
+
+
+def delete_task_occurrences(session: Session, task_ids) -> None:
+    task_ids = list(task_ids)
+    session.exec(delete(TaskOccurrence).where(TaskOccurrence.task_id.in_(task_ids)))
+    session.exec(delete(OccurrenceHorizon).where(OccurrenceHorizon.task_id.in_(task_ids)))
+    mark_table_dirty(session, TaskOccurrence.__tablename__)
+
+
+def roll_forward_occurrences(
+    session: Session, until: datetime | None = None, workers: int = 1
+) -> int:
+    """Extend every recurring task's stored occurrences to ``until`` (default: the horizon).
+
+    Tasks never materialized are generated from ``OCCURRENCE_LOOKBACK_DAYS``
+    ago, expanding across ``workers`` processes. Does not commit. Returns the
+    number of tasks extended.
+    """
+    until = until or horizon_end()
+    rows = session.exec(
+        select(Task.id, Task.recurrence_rule, Task.due_date, Task.created_at, OccurrenceHorizon)
+        .outerjoin(OccurrenceHorizon, OccurrenceHorizon.task_id == Task.id)
+        .where(Task.recurrence_rule.is_not(None), Task.recurrence_rule != "")
+    ).all()
+
+    first_start = _today() - timedelta(days=settings.occurrence_lookback_days)
+    windows = {}
+    horizons = {}
+    for row in rows:
+        horizon = row.OccurrenceHorizon
+        if horizon is None:
+            horizon = OccurrenceHorizon(
+                task_id=row.id, generated_from=first_start, generated_until=first_start
+            )
+        if horizon.generated_until < until:
+            windows[row.id] = (task_series(row), horizon.generated_until, until)
+            horizons[row.id] = horizon
+
+    for task_id, reached in _materialize(session, windows, workers).items():
+        horizons[task_id].generated_until = reached
+        session.add(horizons[task_id])
+    return len(windows)
+
+
+def run_scheduled_roll_forward(engine: Engine, event: dict | None = None) -> dict:
+    """Roll stored occurrences forward for a scheduled job.
+
+    ``event`` may carry ``horizon_days`` to override ``OCCURRENCE_HORIZON_DAYS``
+    and ``workers`` to expand across several processes.
+    """
+    event = event or {}
+    until = horizon_end()
+    if event.get("horizon_days") is not None:
+        until = _today() + timedelta(days=int(event["horizon_days"]))
+
+    with Session(engine) as session:
+        tasks = roll_forward_occurrences(session, until, int(event.get("workers", 1)))
+        session.commit()
+    return {"until": until.isoformat(), "tasks": tasks}
+
+
+def _is_materialized(session: Session, start: datetime, end: datetime, category_id) -> bool:
+    query = (
+        select(func.count())
+        .select_from(Task)
+        .outerjoin(OccurrenceHorizon, OccurrenceHorizon.task_id == Task.id)
+        .where(
+            Task.recurrence_rule.is_not(None),
+            Task.recurrence_rule != "",
+            or_(
+                OccurrenceHorizon.task_id.is_(None),
+                OccurrenceHorizon.generated_from > start,
+                OccurrenceHorizon.generated_until < end,
+            ),
+        )
+    )
+    if category_id is not None:
+        query = query.where(Task.category_id == category_id)
+    return session.exec(query).one() == 0
+
+
+def _stored_occurrences(
+    session: Session, start: datetime, end: datetime, category_id, limit_per_task: int
+) -> list[dict]:
+    query = (
+        select(
+            TaskOccurrence.id,
+            TaskOccurrence.task_id,
+            Task.title,
+            Task.category_id,
+            Task.priority,
+            TaskOccurrence.occurs_at,
+            TaskOccurrence.is_completed,
+        )
+        .join(Task, Task.id == TaskOccurrence.task_id)
+        .where(
+            TaskOccurrence.occurs_at >= start,
+            TaskOccurrence.occurs_at < end,
+            Task.recurrence_rule.is_not(None),
+            Task.recurrence_rule != "",
+        )
+        .order_by(TaskOccurrence.occurs_at, TaskOccurrence.task_id)
+    )
+    if category_id is not None:
+        query = query.where(Task.category_id == category_id)
+
+    per_task = Counter()
+    occurrences = []
+    rows = session.exec(query).all()
+    for occurrence_id, task_id, title, category, priority, occurs_at, is_completed in rows:
+        per_task[task_id] += 1
+        if per_task[task_id] <= limit_per_task:
+            occurrences.append(
+                {
+                    "occurrence_id": occurrence_id,
+                    "task_id": task_id,
+                    "title": title,
+                    "category_id": category,
+                    "priority": priority,
+                    "occurs_at": occurs_at,
+                    "is_completed": is_completed,
+                }
+            )
+    return occurrences
+
+
+def get_task_occurrences(
+    session: Session,
+    start: datetime,
+    end: datetime,
+    category_id: int | None = None,
+    limit_per_task: int = 100,
+) -> list[dict]:
+    """Every occurrence of every recurring task in ``[start, end)``, in time order.
+
+    Windows within the stored horizon of every matching task are a range scan
+    over ``task_occurrences``. Anything else is expanded from the rules: tasks
+    are read in one query and grouped by series, so a rule shared by many
+    tasks is expanded once.
+    """
+    if _is_materialized(session, start, end, category_id):
+        return _stored_occurrences(session, start, end, category_id, limit_per_task)
+
+    query = select(
+        Task.id,
+        Task.title,
+        Task.category_id,
+        Task.priority,
+        Task.recurrence_rule,
+        Task.due_date,
+        Task.created_at,
+    ).where(Task.recurrence_rule.is_not(None), Task.recurrence_rule != "")
+    if category_id is not None:
+        query = query.where(Task.category_id == category_id)
+    tasks = session.exec(query).all()
+
+    tasks_by_series = [(task, task_series(task)) for task in tasks]
+    expanded = expand_many([series for _, series in tasks_by_series], start, end, limit_per_task)
+
+    occurrences = [
+        {
+            "occurrence_id": None,
+            "task_id": task_id,
+            "title": title,
+            "category_id": category_id,
+            "priority": priority,
+            "occurs_at": occurs_at,
+            "is_completed": False,
+        }
+        for (task_id, title, category_id, priority, *_), series in tasks_by_series
+        for occurs_at in expanded[series]
+    ]
+    occurrences.sort(key=itemgetter("occurs_at", "task_id"))
+    return occurrences
@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, tuple_
+from sqlmodel import Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match sort key")
+        return tuple(
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values, strict=True)
+        )
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from exc
+
+
+def keyset_query(query, columns: list, cursor: str | None, descending: bool = False):
+    """Order ``query`` by ``columns`` and skip everything up to ``cursor``.
+
+    The last column must be unique (normally the primary key) so the ordering is
+    total and a page boundary can never split or repeat rows.
+    """
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(cursor, columns))
+        query = query.where(key < after if descending else key > after)
+
+    return query.order_by(*(column.desc() if descending else column for column in columns))
+
+
+def keyset_page(
+    session: Session,
+    query,
+    columns: list,
+    cursor: str | None,
+    limit: int,
+    descending: bool = False,
+) -> tuple[list, str | None]:
+    """Fetch one page of ``query`` after ``cursor`` plus the cursor for the next page."""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    query = keyset_query(query, columns, cursor, descending)
+    rows = session.exec(query.limit(limit + 1)).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(*(getattr(last, column.key) for column in columns))
@@ -1,16 +1,46 @@
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 
-from sqlmodel import Session, func, select
+from sqlalchemy import insert
+from sqlmodel import Session, delete, func, select
 
-from models import Category, ProductivityLog, Task, TimeBlock
+from models import Category, ProductivityDay, ProductivityLog, Task, TimeBlock
+from services.intervals import (
+    clip,
+    covered_minutes,
+    covered_minutes_by_key,
+    day_window,
+    days_spanned,
+)
 from utils import utcnow
 
 
+def _day_bounds(target_date: date) -> tuple[datetime, datetime]:
+    return (
+        datetime.combine(target_date, datetime.min.time()),
+        datetime.combine(target_date, datetime.max.time()),
+    )
+
+
+def _overlapping_blocks(query, window_start: datetime, window_end: datetime):
+    return query.where(TimeBlock.start_time < window_end, TimeBlock.end_time > window_start)
+
+
+def _score(tasks_completed: int, high_priority_tasks: int, time_spent: float) -> float:
+    task_score = tasks_completed * 10
+    time_score = min(time_spent / 60 * 5, 50)
+    priority_bonus = high_priority_tasks * 5
+
+    total_score = min(task_score + time_score + priority_bonus, 100.0)
+
+    return round(total_score, 2)
+
+
 def calculate_daily_score(
     session: Session, target_date: date, category_id: int | None = None
 ) -> float:
-    start_of_day = datetime.combine(target_date, datetime.min.time())
-    end_of_day = datetime.combine(target_date, datetime.max.time())
+    start_of_day, end_of_day = _day_bounds(target_date)
+    window = day_window(target_date)
 
     query = select(Task).where(
         Task.is_completed == True,
@@ -23,87 +53,86 @@ def calculate_daily_score(
 
     completed_tasks = session.exec(query).all()
 
-    time_blocks_query = select(TimeBlock).where(
-        TimeBlock.start_time >= start_of_day, TimeBlock.end_time <= end_of_day
-    )
+    time_blocks_query = _overlapping_blocks(select(TimeBlock), *window)
 
     if category_id:
-        time_blocks_query = time_blocks_query.where(TimeBlock.task_id.in_([t.id for t in completed_tasks]))
+        time_blocks_query = time_blocks_query.where(
+            TimeBlock.task_id.in_([t.id for t in completed_tasks])
+        )
 
     time_blocks = session.exec(time_blocks_query).all()
 
-    time_spent = sum(
-        (block.end_time - block.start_time).total_seconds() / 60 for block in time_blocks
+    time_spent = covered_minutes(
+        clip(((block.start_time, block.end_time) for block in time_blocks), *window)
     )
-
-    task_score = len(completed_tasks) * 10
-    time_score = min(time_spent / 60 * 5, 50)
-
     high_priority_tasks = sum(1 for task in completed_tasks if task.priority >= 3)
-    priority_bonus = high_priority_tasks * 5
-
-    total_score = min(task_score + time_score + priority_bonus, 100.0)
-
-    return round(total_score, 2)
 
+    return _score(len(completed_tasks), high_priority_tasks, time_spent)
 
-def get_productivity_summary(session: Session, target_date: date) -> dict:
-    start_of_day = datetime.combine(target_date, datetime.min.time())
-    end_of_day = datetime.combine(target_date, datetime.max.time())
 
-    completed_tasks = session.exec(
-        select(Task).where(
-            Task.is_completed == True,
-            Task.completed_at >= start_of_day,
-            Task.completed_at <= end_of_day,
-        )
-    ).all()
+def build_productivity_summary(target_date: date, completed_tasks, time_blocks) -> dict:
+    """Assemble a day's summary from already-fetched rows, without touching the database.
 
-    time_blocks = session.exec(
-        select(TimeBlock).where(
-            TimeBlock.start_time >= start_of_day, TimeBlock.end_time <= end_of_day
-        )
-    ).all()
+    ``completed_tasks`` rows carry ``id``, ``category_id``, ``priority`` and
+    ``category_name``; ``time_blocks`` rows carry ``task_id``, ``start_time``,
+    ``end_time`` and the owning task's ``task_found``, ``category_id`` and
+    ``category_name``. Blocks are clipped to the day and overlapping blocks
+    are counted once. Scores match ``calculate_daily_score`` for the same day.
+    """
+    window = day_window(target_date)
+    blocks = [
+        (block, start, end)
+        for block in time_blocks
+        for start, end in clip([(block.start_time, block.end_time)], *window)
+    ]
 
-    total_time_spent = sum(
-        (block.end_time - block.start_time).total_seconds() / 60 for block in time_blocks
+    total_time_spent = covered_minutes((start, end) for _, start, end in blocks)
+    daily_score = _score(
+        len(completed_tasks),
+        sum(1 for task in completed_tasks if task.priority >= 3),
+        total_time_spent,
     )
 
-    category_stats = {}
+    category_tasks = {}
+    category_names = {}
     for task in completed_tasks:
-        cat_id = task.category_id
-        if cat_id not in category_stats:
-            category_stats[cat_id] = {"tasks": 0, "time": 0}
-        category_stats[cat_id]["tasks"] += 1
+        category_tasks.setdefault(task.category_id, []).append(task)
+        category_names[task.category_id] = task.category_name
 
-    for block in time_blocks:
-        if block.task_id:
-            task = session.get(Task, block.task_id)
-            if task:
-                cat_id = task.category_id
-                if cat_id not in category_stats:
-                    category_stats[cat_id] = {"tasks": 0, "time": 0}
-                category_stats[cat_id]["time"] += (
-                    block.end_time - block.start_time
-                ).total_seconds() / 60
+    task_blocks = [
+        (block, start, end) for block, start, end in blocks if block.task_id and block.task_found
+    ]
+    for block, _, _ in task_blocks:
+        category_names.setdefault(block.category_id, block.category_name)
+    category_time = covered_minutes_by_key(
+        (block.category_id, start, end) for block, start, end in task_blocks
+    )
 
     categories_data = []
-    for cat_id, stats in category_stats.items():
-        category = session.get(Category, cat_id) if cat_id else None
-        score = calculate_daily_score(session, target_date, cat_id)
+    for cat_id in category_names:
+        tasks = category_tasks.get(cat_id, [])
+        if cat_id:
+            task_ids = {task.id for task in tasks}
+            score = _score(
+                len(tasks),
+                sum(1 for task in tasks if task.priority >= 3),
+                covered_minutes(
+                    (start, end) for block, start, end in blocks if block.task_id in task_ids
+                ),
+            )
+        else:
+            score = daily_score
 
         categories_data.append(
             {
                 "category_id": cat_id,
-                "category_name": category.name if category else "Uncategorized",
-                "tasks_completed": stats["tasks"],
-                "time_spent": int(stats["time"]),
+                "category_name": (category_names[cat_id] if cat_id else None) or "Uncategorized",
+                "tasks_completed": len(tasks),
+                "time_spent": int(category_time.get(cat_id, 0)),
                 "score": score,
             }
         )
 
-    daily_score = calculate_daily_score(session, target_date)
-
     return {
         "date": target_date,
         "daily_score": daily_score,
@@ -113,30 +142,198 @@ def get_productivity_summary(session: Session, target_date: date) -> dict:
     }
 
 
-def update_productivity_logs(session: Session, target_date: date):
-    summary = get_productivity_summary(session, target_date)
+def _fetch_summary_rows(
+    session: Session, first_day: date, last_day: date, category_ids: list[int] | None = None
+):
+    tasks_query = (
+        select(
+            Task.id,
+            Task.category_id,
+            Task.priority,
+            Task.completed_at,
+            Category.name.label("category_name"),
+        )
+        .outerjoin(Category, Task.category_id == Category.id)
+        .where(
+            Task.is_completed == True,
+            Task.completed_at >= _day_bounds(first_day)[0],
+            Task.completed_at <= _day_bounds(last_day)[1],
+        )
+    )
 
-    for cat_data in summary["categories"]:
-        log = session.exec(
-            select(ProductivityLog).where(
-                ProductivityLog.date == target_date,
-                ProductivityLog.category_id == cat_data["category_id"],
-            )
-        ).first()
+    blocks_query = _overlapping_blocks(
+        select(
+            TimeBlock.task_id,
+            TimeBlock.start_time,
+            TimeBlock.end_time,
+            Task.id.is_not(None).label("task_found"),
+            Task.category_id,
+            Category.name.label("category_name"),
+        )
+        .select_from(TimeBlock)
+        .outerjoin(Task, TimeBlock.task_id == Task.id)
+        .outerjoin(Category, Task.category_id == Category.id),
+        day_window(first_day)[0],
+        day_window(last_day)[1],
+    )
 
-        if log:
-            log.score = cat_data["score"]
-            log.tasks_completed = cat_data["tasks_completed"]
-            log.time_spent = cat_data["time_spent"]
-            log.updated_at = utcnow()
-        else:
-            log = ProductivityLog(
-                date=target_date,
-                score=cat_data["score"],
-                category_id=cat_data["category_id"],
-                tasks_completed=cat_data["tasks_completed"],
-                time_spent=cat_data["time_spent"],
-            )
-            session.add(log)
+    if category_ids is not None:
+        tasks_query = tasks_query.where(Task.category_id.in_(category_ids))
+        blocks_query = blocks_query.where(Task.category_id.in_(category_ids))
 
+    return session.exec(tasks_query).all(), session.exec(blocks_query).all()
+
+
+def get_productivity_summary(session: Session, target_date: date) -> dict:
+    completed_tasks, time_blocks = _fetch_summary_rows(session, target_date, target_date)
+    return build_productivity_summary(target_date, completed_tasks, time_blocks)
+
+
+def get_category_productivity(
+    session: Session, target_date: date, category_ids: list[int]
+) -> dict[int, dict]:
+    """Figures for ``category_ids`` only, keyed by id, equal to their summary entries.
+
+    Only those categories' completed tasks and the time blocks of their tasks are
+    read; categories with no activity that day are left out.
+    """
+    completed_tasks, time_blocks = _fetch_summary_rows(
+        session, target_date, target_date, category_ids
+    )
+    summary = build_productivity_summary(target_date, completed_tasks, time_blocks)
+    return {cat_data["category_id"]: cat_data for cat_data in summary["categories"]}
+
+
+def get_productivity_range(session: Session, start: date, end: date) -> list[dict]:
+    """Daily summaries for every date from ``start`` to ``end`` inclusive.
+
+    The whole window is read with the same two queries as a single day, then
+    binned by date; each day is identical to ``get_productivity_summary``.
+    """
+    completed_tasks, time_blocks = _fetch_summary_rows(session, start, end)
+
+    tasks_by_date = defaultdict(list)
+    for task in completed_tasks:
+        tasks_by_date[task.completed_at.date()].append(task)
+
+    blocks_by_date = defaultdict(list)
+    for block in time_blocks:
+        for day in days_spanned(block.start_time, block.end_time):
+            if start <= day <= end:
+                blocks_by_date[day].append(block)
+
+    return [
+        build_productivity_summary(day, tasks_by_date[day], blocks_by_date[day])
+        for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+    ]
+
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def aggregate_productivity(daily: list[dict], granularity: str) -> list[dict]:
+    """Roll consecutive daily summaries up into day, ISO week or calendar month periods.
+
+    Counts and minutes are summed; the period score and each category score are
+    the mean of the daily scores over every day of the period, idle days
+    counting as zero. Periods are clipped to the days supplied.
+    """
+    groups: dict[date, list[dict]] = {}
+    for summary in daily:
+        groups.setdefault(_period_start(summary["date"], granularity), []).append(summary)
+
+    periods = []
+    for days in groups.values():
+        categories: dict = {}
+        for summary in days:
+            for cat_data in summary["categories"]:
+                totals = categories.setdefault(
+                    cat_data["category_id"],
+                    {
+                        "category_id": cat_data["category_id"],
+                        "category_name": cat_data["category_name"],
+                        "tasks_completed": 0,
+                        "time_spent": 0,
+                        "score": 0.0,
+                    },
+                )
+                totals["tasks_completed"] += cat_data["tasks_completed"]
+                totals["time_spent"] += cat_data["time_spent"]
+                totals["score"] += cat_data["score"]
+
+        for totals in categories.values():
+            totals["score"] = round(totals["score"] / len(days), 2)
+
+        periods.append(
+            {
+                "start": days[0]["date"],
+                "end": days[-1]["date"],
+                "score": round(sum(summary["daily_score"] for summary in days) / len(days), 2),
+                "tasks_completed": sum(summary["total_tasks_completed"] for summary in days),
+                "time_spent": sum(summary["total_time_spent"] for summary in days),
+                "categories": list(categories.values()),
+            }
+        )
+
+    return periods
+
+
+def store_productivity_rollups(session: Session, summaries) -> None:
+    """Replace the stored rollup rows for the dates of ``summaries`` in one batch.
+
+    The day totals go to ``ProductivityDay`` and each category to a
+    ``ProductivityLog`` row, inserted in summary order. Does not commit.
+    """
+    summaries = list(summaries)
+    if not summaries:
+        return
+
+    dates = [summary["date"] for summary in summaries]
+    now = utcnow()
+
+    session.execute(delete(ProductivityLog).where(ProductivityLog.date.in_(dates)))
+    session.execute(delete(ProductivityDay).where(ProductivityDay.date.in_(dates)))
+
+    session.execute(
+        insert(ProductivityDay),
+        [
+            {
+                "date": summary["date"],
+                "score": summary["daily_score"],
+                "tasks_completed": summary["total_tasks_completed"],
+                "time_spent": summary["total_time_spent"],
+                "updated_at": now,
+            }
+            for summary in summaries
+        ],
+    )
+
+    logs = [
+        {
+            "date": summary["date"],
+            "score": cat_data["score"],
+            "category_id": cat_data["category_id"],
+            "tasks_completed": cat_data["tasks_completed"],
+            "time_spent": cat_data["time_spent"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for summary in summaries
+        for cat_data in summary["categories"]
+    ]
+    if logs:
+        session.execute(insert(ProductivityLog), logs)
+
+
+def store_productivity_rollup(session: Session, summary: dict) -> None:
+    store_productivity_rollups(session, [summary])
+
+
+def update_productivity_logs(session: Session, target_date: date):
+    store_productivity_rollup(session, get_productivity_summary(session, target_date))
     session.commit()
@@ -0,0 +1,181 @@
+from copy import copy
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from models import Category, SubTask, Task, TimeBlock
+from schemas import (
+    CategoryCreate,
+    CategoryUpdate,
+    SubTaskCreate,
+    SubTaskUpdate,
+    TaskCreate,
+    TaskUpdate,
+    TimeBlockCreate,
+    TimeBlockUpdate,
+)
+from services import mutations
+from services.events import FLUSHED_CHANGES_KEY
+from services.reminders import PENDING_REMINDERS_KEY
+
+ENTITY_HANDLERS = {
+    "task": (
+        Task,
+        "Task not found",
+        TaskCreate,
+        TaskUpdate,
+        mutations.create_task,
+        mutations.update_task,
+        mutations.delete_task,
+    ),
+    "subtask": (
+        SubTask,
+        "SubTask not found",
+        SubTaskCreate,
+        SubTaskUpdate,
+        mutations.create_subtask,
+        mutations.update_subtask,
+        mutations.delete_subtask,
+    ),
+    "category": (
+        Category,
+        "Category not found",
+        CategoryCreate,
+        CategoryUpdate,
+        mutations.create_category,
+        mutations.update_category,
+        mutations.delete_category,
+    ),
+    "time_block": (
+        TimeBlock,
+        "Time block not found",
+        TimeBlockCreate,
+        TimeBlockUpdate,
+        mutations.create_time_block,
+        mutations.update_time_block,
+        mutations.delete_time_block,
+    ),
+}
+
+# Session state queued for after the commit. An operation whose savepoint is
+# rolled back must not leave its share behind to be published.
+QUEUED_INFO_KEYS = (FLUSHED_CHANGES_KEY, PENDING_REMINDERS_KEY)
+
+# Foreign-key fields that may point at an entity created earlier in the same batch.
+REFERENCE_FIELDS = {
+    "task": {"category_id": "category"},
+    "subtask": {"task_id": "task"},
+    "category": {},
+    "time_block": {"task_id": "task"},
+}
+
+
+def _resolve_id(value, entity_type: str, temp_ids: dict) -> int:
+    if not isinstance(value, str):
+        return value
+    try:
+        return temp_ids[(entity_type, value)]
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown temp id {value!r}"
+        ) from None
+
+
+def validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _apply_operation(session: Session, operation, temp_ids: dict) -> int:
+    model, not_found, create_schema, update_schema, create, update, delete = ENTITY_HANDLERS[
+        operation.entity_type
+    ]
+
+    data = dict(operation.data)
+    for field, target_type in REFERENCE_FIELDS[operation.entity_type].items():
+        if field in data:
+            data[field] = _resolve_id(data[field], target_type, temp_ids)
+
+    if operation.op == "create":
+        if operation.temp_id and (operation.entity_type, operation.temp_id) in temp_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Duplicate temp id {operation.temp_id!r}",
+            )
+        return create(session, create_schema.model_validate(data)).id
+
+    if operation.id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="id is required")
+
+    entity_id = _resolve_id(operation.id, operation.entity_type, temp_ids)
+    entity = session.get(model, entity_id)
+    if not entity or entity in session.deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+
+    if operation.op == "update":
+        update(session, entity, update_schema.model_validate(data).model_dump(exclude_unset=True))
+    else:
+        delete(session, entity)
+    return entity_id
+
+
+def _queued(session: Session) -> dict:
+    return {key: copy(session.info[key]) for key in QUEUED_INFO_KEYS if key in session.info}
+
+
+def _restore_queued(session: Session, queued: dict) -> None:
+    for key in QUEUED_INFO_KEYS:
+        if key in queued:
+            session.info[key] = queued[key]
+        else:
+            session.info.pop(key, None)
+
+
+def apply_push(session: Session, operations: list) -> list[dict]:
+    """Apply client operations in order without committing.
+
+    Each operation runs in its own savepoint, flushed before the next one
+    starts. A rejected operation, whether by validation or by a constraint
+    the database enforces, is rolled back on its own and leaves no partial
+    state behind; the rest of the batch still lands in the caller's single
+    commit.
+    """
+    temp_ids = {}
+    results = []
+
+    for index, operation in enumerate(operations):
+        result = {
+            "index": index,
+            "op": operation.op,
+            "entity_type": operation.entity_type,
+            "temp_id": operation.temp_id,
+            "id": None,
+            "status_code": status.HTTP_200_OK,
+            "error": None,
+        }
+        queued = _queued(session)
+        try:
+            with session.begin_nested():
+                entity_id = _apply_operation(session, operation, temp_ids)
+            result["id"] = entity_id
+            if operation.op == "create":
+                result["status_code"] = status.HTTP_201_CREATED
+                if operation.temp_id:
+                    temp_ids[(operation.entity_type, operation.temp_id)] = entity_id
+        except HTTPException as exc:
+            result["status_code"] = exc.status_code
+            result["error"] = exc.detail
+        except ValidationError as exc:
+            result["status_code"] = status.HTTP_422_UNPROCESSABLE_ENTITY
+            result["error"] = validation_detail(exc)
+        except IntegrityError as exc:
+            result["status_code"] = status.HTTP_409_CONFLICT
+            result["error"] = str(exc.orig)
+        if result["error"] is not None:
+            _restore_queued(session, queued)
+        results.append(result)
+
+    return results
@@ -1,18 +1,144 @@
 from datetime import datetime, timedelta
 
-from dateutil.rrule import DAILY, MONTHLY, WEEKLY, rrule, rrulestr
-
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import (
+    DAILY,
+    HOURLY,
+    MINUTELY,
+    MONTHLY,
+    SECONDLY,
+    WEEKLY,
+    YEARLY,
+    rrule,
+    rrulestr,
+)
+
+from config import settings
+from services.cache import LRUCache
 from utils import utcnow
 
+# Parsed rules by normalized rule string. Invalid strings are cached too, as
+# ``_INVALID``, so a bad rule shared by many tasks is only parsed once.
+rule_cache = LRUCache(maxsize=settings.recurrence_rule_cache_size)
+_INVALID = object()
+_parse_errors = 0
 
-def parse_recurrence_rule(rule_string: str) -> rrule | None:
-    try:
-        if rule_string.upper().startswith("RRULE:"):
-            return rrulestr(rule_string)
-        else:
-            return rrulestr(f"RRULE:{rule_string}")
-    except Exception:
+
+def normalize_rule(rule_string: str) -> str:
+    if not rule_string.upper().startswith("RRULE:"):
+        rule_string = f"RRULE:{rule_string}"
+    # rrulestr upper-cases everything except time zone names.
+    return rule_string if "TZID=" in rule_string.upper() else rule_string.upper()
+
+
+def parse_recurrence_rule(rule_string: str, dtstart: datetime | None = None) -> rrule | None:
+    """Parse ``rule_string``, starting it at ``dtstart`` (default: now) unless it has a DTSTART."""
+    global _parse_errors
+
+    key = normalize_rule(rule_string)
+    rule = rule_cache.get(key)
+    if rule is None:
+        try:
+            rule = rrulestr(key, dtstart=dtstart)
+        except Exception:
+            _parse_errors += 1
+            rule = _INVALID
+        if rule is _INVALID or isinstance(rule, rrule) or "DTSTART" in key:
+            rule_cache.set(key, rule)
+
+    if rule is _INVALID:
         return None
+    if isinstance(rule, rrule) and "DTSTART" not in key:
+        # Without DTSTART a rule starts when it is parsed; keep that for cached rules.
+        return rule.replace(dtstart=dtstart or datetime.now().replace(microsecond=0))
+    return rule
+
+
+def rule_cache_stats() -> dict:
+    return {**rule_cache.stats(), "parse_errors": _parse_errors}
+
+
+# Seeking needs every period to produce the same occurrences regardless of
+# where the series started; these parts break that (COUNT depends on all earlier
+# occurrences), so rules using them are iterated from DTSTART.
+_UNSEEKABLE_PARTS = ("bysetpos", "byweekno", "byyearday", "byeaster")
+# Date parts rrule derives from DTSTART when the rule leaves them out.
+_DTSTART_DEFAULTS = {
+    "bymonth": lambda dtstart: dtstart.month,
+    "bymonthday": lambda dtstart: dtstart.day,
+    "byweekday": lambda dtstart: dtstart.weekday(),
+}
+_FIXED_PERIODS = {
+    WEEKLY: timedelta(weeks=1),
+    DAILY: timedelta(days=1),
+    HOURLY: timedelta(hours=1),
+    MINUTELY: timedelta(minutes=1),
+    SECONDLY: timedelta(seconds=1),
+}
+
+
+def _seek(rule, start: datetime):
+    """Return ``rule`` restarted at the last whole period boundary not after ``start``.
+
+    The result yields exactly the occurrences of ``rule`` from ``start`` onwards
+    but only has to walk the period containing ``start`` to get there.
+    """
+    if not isinstance(rule, rrule) or rule._count:
+        return rule
+    if any(rule._original_rule.get(part) for part in _UNSEEKABLE_PARTS):
+        return rule
+
+    dtstart = rule._dtstart
+    if (dtstart.tzinfo is None) != (start.tzinfo is None) or start <= dtstart:
+        return rule
+
+    freq, interval = rule._freq, rule._interval
+    if freq == YEARLY:
+        step = relativedelta(years=interval)
+        periods = (start.year - dtstart.year) // interval
+    elif freq == MONTHLY:
+        step = relativedelta(months=interval)
+        periods = ((start.year - dtstart.year) * 12 + start.month - dtstart.month) // interval
+    else:
+        step = _FIXED_PERIODS[freq] * interval
+        periods = (start - dtstart) // step
+
+    seek_start = dtstart + step * periods
+    while periods > 0 and seek_start > start:
+        periods -= 1
+        seek_start = dtstart + step * periods
+    if periods <= 0:
+        return rule
+
+    defaults = {
+        part: derive(dtstart)
+        for part, derive in _DTSTART_DEFAULTS.items()
+        if part in rule._original_rule and rule._original_rule[part] is None
+    }
+    return rule.replace(dtstart=seek_start, **defaults)
+
+
+def occurrences_between(
+    rule, start: datetime, end: datetime | None = None, limit: int = 100, inclusive: bool = True
+) -> list[datetime]:
+    """Occurrences of ``rule`` from ``start`` up to ``end`` (both inclusive), at most ``limit``.
+
+    Iteration starts at the period containing ``start`` rather than at DTSTART,
+    so the cost follows the number of occurrences returned, not the age of the
+    series. ``inclusive=False`` excludes an occurrence falling exactly on ``start``.
+    """
+    occurrences = []
+    if limit <= 0:
+        return occurrences
+
+    for occurrence in _seek(rule, start).xafter(start, inc=inclusive):
+        if end is not None and occurrence > end:
+            break
+        occurrences.append(occurrence)
+        if len(occurrences) >= limit:
+            break
+
+    return occurrences
 
 
 def get_next_occurrence(recurrence_rule: str, after: datetime | None = None) -> datetime | None:
@@ -25,9 +151,10 @@ def get_next_occurrence(recurrence_rule: str, after: datetime | None = None) ->
 
     start = after or utcnow()
     try:
-        return rule.after(start)
+        occurrences = occurrences_between(rule, start, limit=1, inclusive=False)
     except Exception:
         return None
+    return occurrences[0] if occurrences else None
 
 
 def expand_recurring_task(
@@ -44,40 +171,28 @@ def expand_recurring_task(
         return []
 
     try:
-        occurrences = []
-        count = 0
-
-        for occurrence in rule:
-            if count >= limit:
-                break
-            if occurrence >= start_date:
-                if end_date and occurrence > end_date:
-                    break
-                occurrences.append(occurrence)
-                count += 1
-
-        return occurrences
+        return occurrences_between(rule, start_date, end_date, limit)
     except Exception:
         return []
 
 
-def parse_simple_recurrence(recurrence: str, base_date: datetime) -> list[datetime]:
-    recurrence = recurrence.lower().strip()
-    occurrences = []
+SIMPLE_RECURRENCES = {
+    "daily": (DAILY, 30),
+    "weekly": (WEEKLY, 12),
+    "monthly": (MONTHLY, 12),
+}
 
-    if recurrence == "daily":
-        for i in range(30):
-            occurrences.append(base_date + timedelta(days=i))
-    elif recurrence == "weekly":
-        for i in range(12):
-            occurrences.append(base_date + timedelta(weeks=i))
-    elif recurrence == "monthly":
-        current = base_date
-        for i in range(12):
-            occurrences.append(current)
-            if current.month == 12:
-                current = current.replace(year=current.year + 1, month=1)
-            else:
-                current = current.replace(month=current.month + 1)
 
-    return occurrences
+def parse_simple_recurrence(recurrence: str, base_date: datetime) -> list[datetime]:
+    simple = SIMPLE_RECURRENCES.get(recurrence.lower().strip())
+    if not simple:
+        return []
+
+    freq, count = simple
+    # rrule drops microseconds from dtstart; expand whole seconds and add them back.
+    start = base_date.replace(microsecond=0)
+    offset = timedelta(microseconds=base_date.microsecond)
+    return [
+        occurrence + offset
+        for occurrence in occurrences_between(rrule(freq, dtstart=start), start, limit=count)
+    ]
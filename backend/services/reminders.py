@@ -0,0 +1,298 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import httpx
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from config import settings
+from models import Task
+from services.events import ChangeBroker, format_sse
+from services.occurrences import task_series
+from services.recurring import normalize_rule, occurrences_between, parse_recurrence_rule
+from utils import to_naive_utc, utcnow
+
+logger = logging.getLogger(__name__)
+
+PENDING_REMINDERS_KEY = "pending_reminders"
+WEBHOOK_TIMEOUT_SECONDS = 5.0
+
+
+class Reminder(NamedTuple):
+    task_id: int
+    title: str
+    reminder_time: datetime
+    recurrence_rule: str | None = None
+    due_date: datetime | None = None
+    created_at: datetime | None = None
+
+
+def _now() -> datetime:
+    return to_naive_utc(utcnow())
+
+
+def reminder_for(task) -> Reminder | None:
+    """The reminder ``task`` currently asks for, or ``None`` if it has none."""
+    if task.is_completed or task.reminder_time is None:
+        return None
+    return Reminder(
+        task_id=task.id,
+        title=task.title,
+        reminder_time=to_naive_utc(task.reminder_time),
+        recurrence_rule=task.recurrence_rule or None,
+        due_date=task.due_date and to_naive_utc(task.due_date),
+        created_at=task.created_at and to_naive_utc(task.created_at),
+    )
+
+
+def next_reminder(reminder: Reminder, after: datetime) -> Reminder | None:
+    """The first firing of ``reminder`` strictly after ``after``.
+
+    A recurring task is reminded of every occurrence, as long before it as its
+    reminder is before its due date. Without a due date the reminder time
+    itself repeats by the rule.
+    """
+    if reminder.reminder_time > after:
+        return reminder
+    if not reminder.recurrence_rule:
+        return None
+
+    if reminder.due_date:
+        rule_string, anchor = task_series(reminder)
+        lead = reminder.due_date - reminder.reminder_time
+    else:
+        rule_string = normalize_rule(reminder.recurrence_rule)
+        anchor = None if "DTSTART" in rule_string else reminder.reminder_time
+        lead = timedelta()
+
+    rule = parse_recurrence_rule(rule_string, dtstart=anchor)
+    if not rule:
+        return None
+    try:
+        upcoming = occurrences_between(rule, after + lead, limit=1, inclusive=False)
+    except Exception:
+        return None
+    if not upcoming:
+        return None
+    return reminder._replace(reminder_time=upcoming[0] - lead)
+
+
+def _payload(reminder: Reminder) -> dict:
+    return {
+        "task_id": reminder.task_id,
+        "title": reminder.title,
+        "reminder_time": reminder.reminder_time.isoformat(),
+    }
+
+
+class ReminderScheduler:
+    """Upcoming reminders in a min-heap, fired from the event loop when due.
+
+    ``load`` reads pending reminders once; after that the write paths keep the
+    heap current through ``update`` and the database is never polled. Each task
+    has one live entry in ``_entries``; heap items it replaced are skipped when
+    they surface. Due reminders go to ``broker`` subscribers and, when
+    ``webhook_url`` is set, are POSTed there as JSON.
+    """
+
+    def __init__(self, broker: ChangeBroker, webhook_url: str = ""):
+        self.broker = broker
+        self.webhook_url = webhook_url
+        self.loaded = False
+        self._heap: list[tuple[datetime, int, Reminder]] = []
+        self._entries: dict[int, Reminder] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._runner: asyncio.Task | None = None
+        self._deliveries: set[asyncio.Task] = set()
+
+    def load(self, session: Session) -> int:
+        tasks = session.exec(
+            select(
+                Task.id,
+                Task.title,
+                Task.reminder_time,
+                Task.recurrence_rule,
+                Task.due_date,
+                Task.created_at,
+                Task.is_completed,
+            ).where(Task.reminder_time.is_not(None), Task.is_completed == False)  # noqa: E712
+        ).all()
+        now = _now()
+        with self._lock:
+            self._entries = {}
+            for task in tasks:
+                reminder = next_reminder(reminder_for(task), now)
+                if reminder is not None:
+                    self._entries[reminder.task_id] = reminder
+            self._heap = [
+                (reminder.reminder_time, next(self._counter), reminder)
+                for reminder in self._entries.values()
+            ]
+            heapq.heapify(self._heap)
+            self.loaded = True
+        return len(self._entries)
+
+    def update(self, reminders: dict[int, Reminder | None]) -> None:
+        """Replace the reminders of the given task ids; ``None`` removes one."""
+        if not self.loaded:
+            return
+        now = _now()
+        with self._lock:
+            earliest = self._heap[0][0] if self._heap else None
+            for task_id, reminder in reminders.items():
+                reminder = reminder and next_reminder(reminder, now)
+                if reminder is None:
+                    self._entries.pop(task_id, None)
+                    continue
+                self._entries[task_id] = reminder
+                heapq.heappush(self._heap, (reminder.reminder_time, next(self._counter), reminder))
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._compact()
+            moved_up = self._heap and (earliest is None or self._heap[0][0] < earliest)
+        if moved_up:
+            self._wake()
+
+    def peek(self) -> Reminder | None:
+        with self._lock:
+            self._discard_replaced()
+            return self._heap[0][2] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _compact(self) -> None:
+        self._heap = [item for item in self._heap if self._entries.get(item[2].task_id) is item[2]]
+        heapq.heapify(self._heap)
+
+    def _discard_replaced(self) -> None:
+        while self._heap and self._entries.get(self._heap[0][2].task_id) is not self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: datetime) -> tuple[list[Reminder], datetime | None]:
+        due = []
+        with self._lock:
+            self._discard_replaced()
+            while self._heap and self._heap[0][0] <= now:
+                reminder = heapq.heappop(self._heap)[2]
+                due.append(reminder)
+                following = next_reminder(reminder, reminder.reminder_time)
+                if following is None:
+                    del self._entries[reminder.task_id]
+                else:
+                    self._entries[reminder.task_id] = following
+                    heapq.heappush(
+                        self._heap, (following.reminder_time, next(self._counter), following)
+                    )
+                self._discard_replaced()
+            return due, self._heap[0][0] if self._heap else None
+
+    def _wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass
+
+    def _fire(self, reminders: list[Reminder]) -> None:
+        payloads = [_payload(reminder) for reminder in reminders]
+        self.broker.publish(payloads)
+        if self.webhook_url:
+            delivery = asyncio.create_task(self._post_webhook(payloads))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+    async def _post_webhook(self, payloads: list[dict]) -> None:
+        try:
+            async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS) as client:
+                for payload in payloads:
+                    response = await client.post(self.webhook_url, json=payload)
+                    response.raise_for_status()
+        except httpx.HTTPError as exc:
+            logger.warning("Reminder webhook %s failed: %s", self.webhook_url, exc)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            due, next_time = self._pop_due(_now())
+            if due:
+                self._fire(due)
+            timeout = None
+            if next_time is not None:
+                timeout = max((next_time - _now()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self, session: Session) -> None:
+        """Load pending reminders and start firing them on the running event loop."""
+        self.load(session)
+        self._runner = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        self._loop = self._wakeup = None
+        self.loaded = False
+
+
+reminder_broker = ChangeBroker()
+reminder_scheduler = ReminderScheduler(reminder_broker, settings.reminder_webhook_url)
+
+
+def queue_reminder(session: Session, task_id: int, reminder: Reminder | None) -> None:
+    """Hand ``task_id``'s reminder to the scheduler once the session commits."""
+    session.info.setdefault(PENDING_REMINDERS_KEY, {})[task_id] = reminder
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_committed_reminders(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(PENDING_REMINDERS_KEY, None)
+    if pending:
+        reminder_scheduler.update(pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_reminders(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(PENDING_REMINDERS_KEY, None)
+
+
+async def reminder_events(
+    heartbeat_seconds: float,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    broker: ChangeBroker = reminder_broker,
+) -> AsyncIterator[str]:
+    """Yield an SSE frame for every reminder fired while the client is connected."""
+    subscriber = broker.subscribe()
+    try:
+        yield f"retry: {int(heartbeat_seconds * 1000)}\n\n"
+        while not subscriber.overflowed:
+            try:
+                reminder = await asyncio.wait_for(subscriber.queue.get(), heartbeat_seconds)
+            except TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": heartbeat\n\n"
+                continue
+            yield format_sse(reminder, event_name="reminder")
+    finally:
+        broker.unsubscribe(subscriber)
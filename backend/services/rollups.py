@@ -0,0 +1,241 @@
+from datetime import date
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlmodel import Session, select
+
+from config import settings
+from models import Category, ProductivityDay, ProductivityLog, Task, TimeBlock
+from services.cache import LRUCache
+from services.intervals import days_spanned
+from services.productivity import get_productivity_summary, store_productivity_rollup
+from services.versions import get_table_versions
+
+DIRTY_DATES_KEY = "dirty_productivity_dates"
+COMMITTED_DATES_KEY = "committed_productivity_dates"
+CATEGORIES_CHANGED_KEY = "productivity_categories_changed"
+
+# Tables a productivity summary is computed from; their versions tag the ETag
+# of productivity responses and every cached summary.
+PRODUCTIVITY_TABLES = [Task.__tablename__, TimeBlock.__tablename__, Category.__tablename__]
+
+# Summaries by date, each stored with the versions of PRODUCTIVITY_TABLES it was
+# read at. A commit in this process drops the dates it touched; a write handled
+# by another process bumps a version, which makes every older entry stale.
+summary_cache = LRUCache(maxsize=settings.productivity_cache_size)
+
+# Fields whose change can move a day's productivity numbers.
+TASK_ROLLUP_FIELDS = ("is_completed", "completed_at", "priority", "category_id")
+TIME_BLOCK_ROLLUP_FIELDS = ("task_id", "start_time", "end_time")
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    pass
+
+
+# Load the previous value when these attributes are assigned, even if they were
+# expired, so a flush can always see which dates a change moved away from.
+for _attribute in (Task.completed_at, TimeBlock.start_time, TimeBlock.end_time):
+    event.listen(_attribute, "set", _noop_set, active_history=True)
+
+
+def mark_dates_dirty(session: Session, dates) -> None:
+    """Queue the productivity rollups of ``dates`` for recomputation at commit."""
+    dates = {value for value in dates if value is not None}
+    if dates:
+        session.info.setdefault(DIRTY_DATES_KEY, set()).update(dates)
+
+
+def _attribute_dates(state, key: str) -> set[date]:
+    history = state.attrs[key].history
+    values = chain(history.added, history.unchanged, history.deleted)
+    return {value.date() for value in values if value is not None}
+
+
+def _previous_and_current(state, key: str):
+    history = state.attrs[key].history
+    current = next(chain(history.added, history.unchanged), None)
+    return next(iter(history.deleted), current), current
+
+
+def _block_span_dates(state) -> set[date]:
+    # A block counts towards every day it overlaps, before and after the change.
+    old_start, new_start = _previous_and_current(state, "start_time")
+    old_end, new_end = _previous_and_current(state, "end_time")
+    return set(days_spanned(old_start, old_end)) | set(days_spanned(new_start, new_end))
+
+
+def _load(obj, *keys: str) -> None:
+    # Expired attributes have no history; reading them loads the stored value.
+    for key in keys:
+        getattr(obj, key)
+
+
+def _changed(state, keys) -> bool:
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+
+def task_block_dates(session: Session, task_ids) -> set[date]:
+    """Every day the time blocks of ``task_ids`` overlap."""
+    if not task_ids:
+        return set()
+    with session.no_autoflush:
+        rows = session.exec(
+            select(TimeBlock.start_time, TimeBlock.end_time).where(
+                TimeBlock.task_id.in_(list(task_ids))
+            )
+        ).all()
+    return {day for start, end in rows for day in days_spanned(start, end)}
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_dirty_dates(session: Session, flush_context, instances) -> None:
+    dates = set()
+    moved_task_ids = set()
+    candidates = chain(
+        ((obj, False) for obj in session.new),
+        ((obj, False) for obj in session.dirty),
+        ((obj, True) for obj in session.deleted),
+    )
+
+    for obj, deleted in candidates:
+        if isinstance(obj, Category):
+            # Summaries carry category names, which a rename, delete or reused id changes.
+            state = inspect(obj)
+            if state.pending or deleted or _changed(state, ("name",)):
+                session.info[CATEGORIES_CHANGED_KEY] = True
+        elif isinstance(obj, Task):
+            state = inspect(obj)
+            _load(obj, "completed_at")
+            if state.pending or deleted or _changed(state, TASK_ROLLUP_FIELDS):
+                dates |= _attribute_dates(state, "completed_at")
+            # A task's blocks count towards its category, so moving or deleting
+            # the task moves that time too.
+            if state.key and (deleted or _changed(state, ("category_id",))):
+                moved_task_ids.add(obj.id)
+        elif isinstance(obj, TimeBlock):
+            state = inspect(obj)
+            _load(obj, "start_time", "end_time")
+            if state.pending or deleted or _changed(state, TIME_BLOCK_ROLLUP_FIELDS):
+                dates |= _block_span_dates(state)
+
+    mark_dates_dirty(session, dates | task_block_dates(session, moved_task_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_adopted_block_dates(session: Session, flush_context) -> None:
+    # SQLite hands a deleted task's id to the next task created, which then
+    # picks up any time blocks still pointing at that id.
+    new_task_ids = {obj.id for obj in session.new if isinstance(obj, Task)}
+    mark_dates_dirty(session, task_block_dates(session, new_task_ids))
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_dirty_rollups(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    # Flush first: the final flush of the commit runs after this hook, and the
+    # dates it would dirty must be refreshed in this same transaction.
+    session.flush()
+    dirty = session.info.pop(DIRTY_DATES_KEY, None)
+    if dirty:
+        for target_date in sorted(dirty):
+            store_productivity_rollup(session, get_productivity_summary(session, target_date))
+        session.info.setdefault(COMMITTED_DATES_KEY, set()).update(dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_summaries(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    if session.info.pop(CATEGORIES_CHANGED_KEY, False):
+        summary_cache.clear()
+    committed = session.info.pop(COMMITTED_DATES_KEY, None)
+    if committed:
+        summary_cache.invalidate(committed)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_dirty_dates(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        for key in (DIRTY_DATES_KEY, COMMITTED_DATES_KEY, CATEGORIES_CHANGED_KEY):
+            session.info.pop(key, None)
+
+
+def _ensure_rollup(session: Session, target_date: date) -> ProductivityDay:
+    day = session.get(ProductivityDay, target_date)
+    if day is None:
+        store_productivity_rollup(session, get_productivity_summary(session, target_date))
+        session.commit()
+        day = session.get(ProductivityDay, target_date)
+    return day
+
+
+def _category_rows(session: Session, target_date: date):
+    return session.exec(
+        select(ProductivityLog, Category.name)
+        .outerjoin(Category, ProductivityLog.category_id == Category.id)
+        .where(ProductivityLog.date == target_date)
+        .order_by(ProductivityLog.id)
+    ).all()
+
+
+def _category_data(log: ProductivityLog, name: str | None) -> dict:
+    return {
+        "category_id": log.category_id,
+        "category_name": (name if log.category_id else None) or "Uncategorized",
+        "tasks_completed": log.tasks_completed,
+        "time_spent": log.time_spent,
+        "score": log.score,
+    }
+
+
+def get_rollup_summary(session: Session, target_date: date) -> dict:
+    """Read a day's productivity summary from the stored rollups.
+
+    Writes keep the rollups of the dates they touch current, so this is a
+    primary-key lookup plus one row per category. A date that has never been
+    rolled up is computed from tasks and time blocks once and stored.
+    """
+    day = _ensure_rollup(session, target_date)
+
+    return {
+        "date": target_date,
+        "daily_score": day.score,
+        "total_tasks_completed": day.tasks_completed,
+        "total_time_spent": day.time_spent,
+        "categories": [
+            _category_data(log, name) for log, name in _category_rows(session, target_date)
+        ],
+    }
+
+
+def productivity_versions(session: Session) -> tuple:
+    """The versions of ``PRODUCTIVITY_TABLES``, as a comparable tuple."""
+    return tuple(sorted(get_table_versions(session, PRODUCTIVITY_TABLES).items()))
+
+
+def peek_cached_summary(session: Session, target_date: date) -> dict | None:
+    """The cached summary of ``target_date`` if it is still current, else ``None``."""
+    entry = summary_cache.get(target_date)
+    if entry is None:
+        return None
+    versions, summary = entry
+    return summary if versions == productivity_versions(session) else None
+
+
+def get_cached_summary(session: Session, target_date: date) -> dict:
+    """``get_rollup_summary`` behind the in-process ``summary_cache``.
+
+    Costs one ``table_versions`` read when the cached summary is current.
+    """
+    versions = productivity_versions(session)
+    entry = summary_cache.get(target_date)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+    # Versions read before the summary are never newer than the data it holds,
+    # so a write landing in between only makes the entry miss next time.
+    generation = summary_cache.generation
+    summary = get_rollup_summary(session, target_date)
+    summary_cache.set(target_date, (versions, summary), generation=generation)
+    return summary
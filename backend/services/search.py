@@ -0,0 +1,65 @@
+import re
+
+from sqlalchemy import literal_column, or_
+from sqlmodel import Session, select
+
+from models import Task, tasks_fts
+
+_WORD = re.compile(r"\w+")
+
+
+def match_query(q: str) -> str | None:
+    """Turn free text into an FTS5 query matching every word, the last as a prefix.
+
+    Words are quoted, so punctuation and FTS5 operators in ``q`` are searched
+    for as text rather than parsed. Returns ``None`` if ``q`` has no words.
+    """
+    words = _WORD.findall(q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def _filtered(query, category_id: int | None, is_completed: bool | None):
+    if category_id is not None:
+        query = query.where(Task.category_id == category_id)
+    if is_completed is not None:
+        query = query.where(Task.is_completed == is_completed)
+    return query
+
+
+def search_tasks(
+    session: Session,
+    q: str,
+    category_id: int | None = None,
+    is_completed: bool | None = None,
+    limit: int = 20,
+) -> list[Task]:
+    """Tasks whose title, description or notes match ``q``, best match first.
+
+    On SQLite this is a ``tasks_fts`` lookup ranked by BM25, with title matches
+    weighted highest. Other databases fall back to a case-insensitive substring
+    scan, newest first.
+    """
+    match = match_query(q)
+    if match is None:
+        return []
+
+    if session.get_bind().dialect.name != "sqlite":
+        patterns = [f"%{word}%" for word in _WORD.findall(q)]
+        query = select(Task).where(
+            *(
+                or_(Task.title.ilike(p), Task.description.ilike(p), Task.notes.ilike(p))
+                for p in patterns
+            )
+        )
+        query = _filtered(query, category_id, is_completed)
+        return session.exec(query.order_by(Task.created_at.desc()).limit(limit)).all()
+
+    query = (
+        select(Task)
+        .join(tasks_fts, tasks_fts.c.rowid == Task.id)
+        .where(literal_column("tasks_fts").op("MATCH")(match))
+    )
+    query = _filtered(query, category_id, is_completed)
+    return session.exec(query.order_by(tasks_fts.c.rank, Task.id).limit(limit)).all()
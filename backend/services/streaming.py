@@ -0,0 +1,49 @@
+from collections.abc import Callable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def limit_stream(request: Request, query, limit: int):
+    """Streams run to the end of the result set unless the client caps them."""
+    if "limit" in request.query_params:
+        return query.limit(limit)
+    return query
+
+
+def stream_ndjson(
+    session: Session,
+    query,
+    schema,
+    headers: dict | None = None,
+    expand: Callable[[list], list] | None = None,
+) -> StreamingResponse:
+    """Stream ``query`` as one JSON document per line.
+
+    Rows are pulled from the database cursor in batches of ``STREAM_BATCH_SIZE``
+    and serialized one at a time, so memory stays flat however many rows match.
+    ``expand``, if given, maps each batch before it is serialized, so related
+    rows can be loaded once per batch. The generator outlives the request's
+    dependency scope, so it closes the session itself once the stream is drained.
+    The read transaction stays open until then; SQLite runs in WAL mode (see
+    ``database``) so it does not hold off writers.
+    """
+
+    def generate():
+        try:
+            rows = session.exec(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+            for batch in rows.partitions():
+                for row in expand(batch) if expand else batch:
+                    yield schema.model_validate(row).model_dump_json() + "\n"
+        finally:
+            session.close()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
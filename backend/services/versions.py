@@ -0,0 +1,84 @@
+import hashlib
+
+from fastapi import Request, Response, status
+from sqlalchemy import event, update
+from sqlmodel import Session, select
+
+from models import TableVersion
+
+DIRTY_TABLES_KEY = "dirty_tables"
+
+
+def mark_table_dirty(session: Session, table_name: str) -> None:
+    """Queue a version bump for ``table_name`` when the session commits."""
+    session.info.setdefault(DIRTY_TABLES_KEY, set()).add(table_name)
+
+
+def bump_table_versions(session: Session, table_names) -> None:
+    for table_name in sorted(table_names):
+        result = session.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name == table_name)
+            .values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            session.add(TableVersion(table_name=table_name, version=1))
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_dirty_tables(session: Session) -> None:
+    # Releasing a savepoint fires the commit hooks too; only the outermost
+    # commit applies or publishes anything.
+    if session.in_nested_transaction():
+        return
+    # One bump per table per transaction, however many rows the transaction wrote.
+    dirty = session.info.pop(DIRTY_TABLES_KEY, None)
+    if dirty:
+        bump_table_versions(session, dirty)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_dirty_tables(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(DIRTY_TABLES_KEY, None)
+
+
+def get_table_versions(session: Session, table_names) -> dict[str, int]:
+    rows = session.exec(
+        select(TableVersion).where(TableVersion.table_name.in_(list(table_names)))
+    ).all()
+    versions = dict.fromkeys(table_names, 0)
+    versions.update({row.table_name: row.version for row in rows})
+    return versions
+
+
+def conditional_get(
+    request: Request, response: Response, session: Session, table_names, *extra
+) -> Response | None:
+    """Tag a GET with an ETag derived from table versions.
+
+    Returns a ``304 Not Modified`` response when the client already holds the
+    current representation; otherwise sets the ``ETag`` header on ``response``
+    and returns ``None`` so the route can build the body. Only the small
+    ``table_versions`` table is read to make that decision.
+    """
+    versions = get_table_versions(session, table_names)
+    key = "|".join(
+        [
+            request.url.path,
+            str(request.url.query),
+            request.headers.get("accept", ""),
+            *(f"{name}={version}" for name, version in sorted(versions.items())),
+            *(str(part) for part in extra),
+        ]
+    )
+    etag = f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        if "*" in candidates or etag in candidates or etag[2:] in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return None
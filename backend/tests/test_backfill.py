@@ -0,0 +1,135 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from models import ProductivityDay, ProductivityLog, Task
+from schemas import TimeBlockCreate
+from services.backfill import (
+    date_chunks,
+    recompute_productivity,
+    run_scheduled_recompute,
+    store_chunk,
+)
+from services.mutations import create_time_block
+from services.productivity import get_productivity_range, get_productivity_summary
+from services.rollups import get_rollup_summary, productivity_versions
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed_tasks(engine, start: date, days: int):
+    with Session(engine) as session:
+        for offset in range(days):
+            completed_at = datetime.combine(start + timedelta(days=offset), datetime.min.time())
+            session.add(
+                Task(
+                    title=f"Task {offset}",
+                    priority=offset % 5,
+                    is_completed=True,
+                    completed_at=completed_at + timedelta(hours=9),
+                )
+            )
+        session.commit()
+        # Drop what the write path rolled up so the backfill has work to do.
+        session.exec(ProductivityLog.__table__.delete())
+        session.exec(ProductivityDay.__table__.delete())
+        session.commit()
+
+
+def test_date_chunks_cover_range_without_overlap():
+    chunks = date_chunks(date(2026, 1, 1), date(2026, 3, 5), 31)
+
+    assert chunks[0] == (date(2026, 1, 1), date(2026, 1, 31))
+    assert chunks[-1] == (date(2026, 3, 4), date(2026, 3, 5))
+    assert sum((end - start).days + 1 for start, end in chunks) == 64
+
+
+def test_recompute_productivity_rebuilds_rollups(engine):
+    start = date(2026, 1, 1)
+    _seed_tasks(engine, start, 20)
+    progress = []
+
+    days = recompute_productivity(
+        engine, start, date(2026, 1, 25), chunk_days=7, progress=lambda *args: progress.append(args)
+    )
+
+    assert days == 25
+    assert [(done, total) for done, total, *_ in progress] == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    with Session(engine) as session:
+        assert len(session.exec(select(ProductivityDay)).all()) == 25
+        for offset in (0, 7, 19, 24):
+            target_date = start + timedelta(days=offset)
+            assert get_rollup_summary(session, target_date) == get_productivity_summary(
+                session, target_date
+            )
+
+
+def test_recompute_productivity_resumes_from_checkpoint(engine, tmp_path):
+    start = date(2026, 1, 1)
+    end = date(2026, 1, 14)
+    _seed_tasks(engine, start, 14)
+    checkpoint = tmp_path / "recompute.json"
+    checkpoint.write_text(
+        json.dumps(
+            {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "chunk_days": 7,
+                "done": ["2026-01-01"],
+            }
+        )
+    )
+
+    days = recompute_productivity(engine, start, end, chunk_days=7, checkpoint=str(checkpoint))
+
+    assert days == 7
+    assert not checkpoint.exists()
+    with Session(engine) as session:
+        stored = session.exec(select(ProductivityDay.date)).all()
+        assert sorted(stored) == [start + timedelta(days=offset) for offset in range(7, 14)]
+
+
+def test_recompute_productivity_rejects_foreign_checkpoint(engine, tmp_path):
+    checkpoint = tmp_path / "recompute.json"
+    checkpoint.write_text(json.dumps({"start": "2020-01-01", "end": "2020-02-01", "done": []}))
+
+    with pytest.raises(ValueError):
+        recompute_productivity(
+            engine, date(2026, 1, 1), date(2026, 1, 2), checkpoint=str(checkpoint)
+        )
+
+
+def test_run_scheduled_recompute_defaults_to_last_week(engine):
+    result = run_scheduled_recompute(engine, {"end": "2026-01-10"})
+
+    assert result == {"start": "2026-01-04", "end": "2026-01-10", "days": 7}
+
+
+def test_store_chunk_recomputes_when_written_to_since_compute(engine):
+    chunk = (date(2026, 1, 1), date(2026, 1, 7))
+    _seed_tasks(engine, chunk[0], 3)
+    with Session(engine) as session:
+        computed = productivity_versions(session), get_productivity_range(session, *chunk)
+
+    # A request logs an hour on one of the chunk's days before the chunk is stored.
+    with Session(engine) as session:
+        block = TimeBlockCreate(
+            task_id=1, start_time=datetime(2026, 1, 2, 9), end_time=datetime(2026, 1, 2, 10)
+        )
+        create_time_block(session, block)
+        session.commit()
+
+    store_chunk(engine, chunk, computed)
+
+    with Session(engine) as session:
+        assert session.get(ProductivityDay, date(2026, 1, 2)).time_spent == 60
@@ -114,3 +114,86 @@ def test_category_color_validation(client: TestClient):
         headers={"X-API-Key": "secret-password"},
     )
     assert response.status_code == 422
+
+
+def test_get_categories_conditional_get(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    client.post("/api/categories", json={"name": "Work"}, headers=headers)
+
+    first = client.get("/api/categories", headers=headers)
+    etag = first.headers["ETag"]
+
+    cached = client.get("/api/categories", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    client.post("/api/categories", json={"name": "Personal"}, headers=headers)
+
+    refreshed = client.get("/api/categories", headers={**headers, "If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert len(refreshed.json()) == 2
+
+
+def test_productivity_for_several_categories(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    work = client.post("/api/categories", json={"name": "Work"}, headers=headers).json()
+    home = client.post("/api/categories", json={"name": "Home"}, headers=headers).json()
+    task = client.post(
+        "/api/tasks", json={"title": "Ship it", "category_id": work["id"]}, headers=headers
+    ).json()
+    client.put(f"/api/tasks/{task['id']}", json={"is_completed": True}, headers=headers)
+
+    response = client.get(
+        "/api/productivity/categories",
+        params={"category_ids": [home["id"], work["id"]]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["category_id"] for item in data] == [home["id"], work["id"]]
+    assert data[0]["tasks_completed"] == 0
+    assert data[1]["tasks_completed"] == 1
+
+    missing = client.get(
+        "/api/productivity/categories", params={"category_ids": [9999]}, headers=headers
+    )
+    assert missing.status_code == 404
+
+
+def test_get_categories_pages_by_cursor(client: TestClient):
+    for name in ["Chores", "Admin", "Work", "Admin", "Errands"]:
+        client.post(
+            "/api/categories", json={"name": name}, headers={"X-API-Key": "secret-password"}
+        )
+
+    names = []
+    ids = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(
+            "/api/categories", params=params, headers={"X-API-Key": "secret-password"}
+        )
+        names.extend(category["name"] for category in response.json())
+        ids.extend(category["id"] for category in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert names == ["Admin", "Admin", "Chores", "Errands", "Work"]
+    assert len(set(ids)) == 5
+    assert (
+        client.get(
+            "/api/categories", params={"cursor": "bogus"}, headers={"X-API-Key": "secret-password"}
+        ).status_code
+        == 400
+    )
+
+
+def test_get_categories_rejects_out_of_range_limit(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    for limit in (0, -1, 1001):
+        response = client.get("/api/categories", params={"limit": limit}, headers=headers)
+        assert response.status_code == 422
@@ -0,0 +1,153 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from database import get_session
+from main import app
+
+HEADERS = {"X-API-Key": "secret-password"}
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    for i in range(30):
+        client.post("/api/tasks", json={"title": f"Task {i}", "priority": 1}, headers=HEADERS)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def test_plain_json_is_untouched(client: TestClient):
+    response = client.get("/api/tasks", headers={**HEADERS, "Accept-Encoding": "identity"})
+    assert response.headers["content-type"] == "application/json"
+    assert "content-encoding" not in response.headers
+    assert len(response.json()) == 30
+
+
+def test_gzip_above_minimum_size(client: TestClient):
+    response = client.get("/api/tasks", headers={**HEADERS, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 30
+
+
+def test_brotli_preferred_when_available(client: TestClient):
+    pytest.importorskip("brotli")
+
+    response = client.get("/api/tasks", headers={**HEADERS, "Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 30
+
+
+def test_small_bodies_are_not_compressed(client: TestClient):
+    response = client.get("/api/tasks/1", headers={**HEADERS, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json()["id"] == 1
+
+
+def test_columnar_json(client: TestClient):
+    response = client.get(
+        "/api/tasks",
+        headers={
+            **HEADERS,
+            "Accept": "application/vnd.columnar+json",
+            "Accept-Encoding": "identity",
+        },
+    )
+    assert response.headers["content-type"] == "application/vnd.columnar+json"
+    data = response.json()
+    assert "title" in data["columns"]
+    assert len(data["rows"]) == 30
+    title = data["columns"].index("title")
+    assert data["rows"][0][title] == "Task 29"
+
+
+def test_msgpack(client: TestClient):
+    msgpack = pytest.importorskip("msgpack")
+
+    response = client.get(
+        "/api/tasks",
+        headers={**HEADERS, "Accept": "application/msgpack", "Accept-Encoding": "identity"},
+    )
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == client.get("/api/tasks", headers=HEADERS).json()
+
+
+def test_ndjson_stream_is_compressed_incrementally(client: TestClient):
+    response = client.get(
+        "/api/sync/tasks",
+        headers={**HEADERS, "Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    lines = response.text.splitlines()
+    assert len(lines) == 30
+    assert json.loads(lines[0])["title"] == "Task 0"
+
+
+def test_conditional_get_survives_encoding(client: TestClient):
+    headers = {**HEADERS, "Accept-Encoding": "gzip"}
+    etag = client.get("/api/tasks", headers=headers).headers["ETag"]
+
+    response = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_plain_json_passes_through_byte_for_byte(client: TestClient):
+    expected = client.get("/api/tasks", headers=HEADERS).content
+
+    response = client.get(
+        "/api/tasks",
+        headers={**HEADERS, "Accept": "application/json", "Accept-Encoding": "identity"},
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == expected
+
+    response = client.get(
+        "/api/tasks",
+        headers={**HEADERS, "Accept": "application/json", "Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == expected
+
+
+def test_msgpack_applies_to_object_bodies(client: TestClient):
+    msgpack = pytest.importorskip("msgpack")
+
+    headers = {**HEADERS, "Accept": "application/msgpack", "Accept-Encoding": "gzip"}
+    for path, compressed in (("/api/sync/changes", True), ("/api/tasks/1", False)):
+        response = client.get(path, headers=headers)
+        assert response.headers["content-type"] == "application/msgpack"
+        assert ("content-encoding" in response.headers) is compressed
+        assert msgpack.unpackb(response.content) == client.get(path, headers=HEADERS).json()
+
+
+def test_columnar_falls_back_to_json_for_objects(client: TestClient):
+    expected = client.get("/api/tasks/1", headers=HEADERS).content
+
+    response = client.get(
+        "/api/tasks/1",
+        headers={
+            **HEADERS,
+            "Accept": "application/vnd.columnar+json",
+            "Accept-Encoding": "identity",
+        },
+    )
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == expected
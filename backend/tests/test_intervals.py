@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+
+from services.intervals import (
+    clip,
+    covered_minutes,
+    covered_minutes_by_key,
+    day_window,
+    days_spanned,
+    merge,
+)
+
+BASE = datetime(2026, 3, 10, 9, 0)
+
+
+def at(minutes: int) -> datetime:
+    return BASE + timedelta(minutes=minutes)
+
+
+def test_merge_joins_overlapping_and_touching_intervals():
+    intervals = [(at(60), at(90)), (at(0), at(30)), (at(20), at(45)), (at(45), at(50))]
+
+    assert merge(intervals) == [(at(0), at(50)), (at(60), at(90))]
+
+
+def test_covered_minutes_counts_overlaps_once():
+    assert covered_minutes([(at(0), at(60)), (at(30), at(90)), (at(10), at(20))]) == 90
+    assert covered_minutes([]) == 0
+
+
+def test_clip_cuts_to_window_and_drops_outside():
+    window = (at(0), at(60))
+    intervals = [(at(-30), at(10)), (at(50), at(120)), (at(70), at(80)), (at(-20), at(0))]
+
+    assert clip(intervals, *window) == [(at(0), at(10)), (at(50), at(60))]
+
+
+def test_covered_minutes_by_key_keeps_first_appearance_order():
+    keyed = [("b", at(0), at(30)), ("a", at(0), at(10)), ("b", at(15), at(45))]
+
+    assert covered_minutes_by_key(keyed) == {"b": 45, "a": 10}
+    assert list(covered_minutes_by_key(keyed)) == ["b", "a"]
+
+
+def test_days_spanned_treats_midnight_end_as_exclusive():
+    start, end = day_window(date(2026, 3, 10))
+
+    assert days_spanned(start, end) == [date(2026, 3, 10)]
+    assert days_spanned(end - timedelta(hours=1), end + timedelta(hours=25)) == [
+        date(2026, 3, 10),
+        date(2026, 3, 11),
+        date(2026, 3, 12),
+    ]
+    assert days_spanned(end, end) == []
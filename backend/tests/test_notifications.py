@@ -0,0 +1,161 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from database import get_session
+from main import app
+from services.events import ChangeBroker
+from services.reminders import (
+    Reminder,
+    ReminderScheduler,
+    next_reminder,
+    reminder_events,
+    reminder_scheduler,
+)
+
+HEADERS = {"X-API-Key": "secret-password"}
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="scheduler")
+def scheduler_fixture(session: Session):
+    reminder_scheduler.load(session)
+    yield reminder_scheduler
+    reminder_scheduler.loaded = False
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+async def _never_disconnected():
+    return False
+
+
+def test_next_reminder_follows_the_recurrence():
+    due = datetime(2024, 1, 1, 9, 0)
+    reminder = Reminder(
+        task_id=1,
+        title="Standup",
+        reminder_time=due - timedelta(minutes=15),
+        recurrence_rule="FREQ=DAILY",
+        due_date=due,
+    )
+
+    following = next_reminder(reminder, reminder.reminder_time)
+    later = next_reminder(reminder, datetime(2024, 3, 10, 12, 0))
+
+    assert following.reminder_time == datetime(2024, 1, 2, 8, 45)
+    assert later.reminder_time == datetime(2024, 3, 11, 8, 45)
+    assert next_reminder(reminder._replace(recurrence_rule=None), due) is None
+
+
+def test_write_paths_keep_the_heap_in_sync(client: TestClient, scheduler: ReminderScheduler):
+    soon = _now() + timedelta(hours=1)
+    later = client.post(
+        "/api/tasks",
+        json={"title": "Later", "reminder_time": (soon + timedelta(hours=1)).isoformat()},
+        headers=HEADERS,
+    ).json()
+    first = client.post(
+        "/api/tasks",
+        json={"title": "Soon", "reminder_time": soon.isoformat()},
+        headers=HEADERS,
+    ).json()
+
+    response = client.get("/api/notifications/next-reminder", headers=HEADERS)
+    assert response.json()["task_id"] == first["id"]
+
+    client.put(f"/api/tasks/{first['id']}", json={"is_completed": True}, headers=HEADERS)
+    assert scheduler.peek().task_id == later["id"]
+
+    client.delete(f"/api/tasks/{later['id']}", headers=HEADERS)
+    assert scheduler.peek() is None
+    assert len(scheduler) == 0
+
+
+async def test_due_reminders_are_pushed_to_subscribers():
+    broker = ChangeBroker()
+    scheduler = ReminderScheduler(broker)
+    scheduler.loaded = True
+    runner = asyncio.create_task(scheduler.run())
+    events = reminder_events(5, _never_disconnected, broker)
+    assert (await anext(events)).startswith("retry:")
+
+    due = _now() + timedelta(milliseconds=50)
+    scheduler.update({7: Reminder(task_id=7, title="Call back", reminder_time=due)})
+    frame = await asyncio.wait_for(anext(events), 2)
+
+    assert frame.startswith("event: reminder\n")
+    assert json.loads(frame.split("data: ")[1])["task_id"] == 7
+    assert scheduler.peek() is None
+
+    await events.aclose()
+    runner.cancel()
+
+
+def test_upcoming_reminders_returns_the_window(client: TestClient, session: Session):
+    now = _now()
+    for title, offset, done in [
+        ("Past", -1, False),
+        ("Soon", 1, False),
+        ("Done", 2, True),
+        ("Later", 3, False),
+        ("Next week", 24 * 7, False),
+    ]:
+        task = client.post(
+            "/api/tasks",
+            json={"title": title, "reminder_time": (now + timedelta(hours=offset)).isoformat()},
+            headers=HEADERS,
+        ).json()
+        if done:
+            client.put(f"/api/tasks/{task['id']}", json={"is_completed": True}, headers=HEADERS)
+
+    response = client.get("/api/notifications/upcoming", params={"within": "PT6H"}, headers=HEADERS)
+    limited = client.get(
+        "/api/notifications/upcoming", params={"within": "P1D", "limit": 1}, headers=HEADERS
+    )
+
+    assert response.status_code == 200
+    assert [r["task_title"] for r in response.json()] == ["Soon", "Later"]
+    assert [r["task_title"] for r in limited.json()] == ["Soon"]
+    assert (
+        client.get(
+            "/api/notifications/upcoming", params={"within": "P60D"}, headers=HEADERS
+        ).status_code
+        == 400
+    )
+
+    plan = session.exec(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE is_completed = 0 "
+            "AND reminder_time > '2024-01-01' ORDER BY reminder_time"
+        )
+    ).all()
+    assert "ix_tasks_pending_reminder_time" in plan[0][-1]
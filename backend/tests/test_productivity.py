@@ -1,11 +1,22 @@
 from datetime import date, datetime, timedelta
 
 import pytest
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event, insert
+from sqlmodel import Session, SQLModel, create_engine, select
 from sqlmodel.pool import StaticPool
 
-from models import Category, Task, TimeBlock
-from services.productivity import calculate_daily_score, get_productivity_summary
+from models import Category, ProductivityDay, ProductivityLog, Task, TimeBlock
+from services.cache import LRUCache
+from services.productivity import (
+    aggregate_productivity,
+    calculate_daily_score,
+    get_category_productivity,
+    get_productivity_range,
+    get_productivity_summary,
+    store_productivity_rollup,
+)
+from services.rollups import get_cached_summary, get_rollup_summary, summary_cache
+from services.versions import bump_table_versions
 
 
 @pytest.fixture(name="session")
@@ -147,3 +158,320 @@ def test_productivity_score_max_100(session: Session):
 
     score = calculate_daily_score(session, target_date)
     assert score <= 100.0
+
+
+def test_get_productivity_summary_uses_two_queries_and_matches_scores(session: Session):
+    target_date = date.today()
+    today_start = datetime.combine(target_date, datetime.min.time())
+
+    work = Category(name="Work")
+    home = Category(name="Home")
+    session.add_all([work, home])
+    session.commit()
+
+    tasks = [
+        Task(
+            title=f"Task {i}",
+            priority=i % 5,
+            category_id=[work.id, home.id, None][i % 3],
+            is_completed=True,
+            completed_at=today_start + timedelta(hours=i % 12),
+        )
+        for i in range(9)
+    ]
+    session.add_all(tasks)
+    session.commit()
+    for i, task in enumerate(tasks):
+        session.add(
+            TimeBlock(
+                task_id=task.id,
+                start_time=today_start + timedelta(hours=i),
+                end_time=today_start + timedelta(hours=i, minutes=45),
+            )
+        )
+    session.commit()
+
+    statements = []
+    engine = session.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        summary = get_productivity_summary(session, target_date)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # The session opens its transaction with BEGIN; that is not a query.
+    assert len([statement for statement in statements if statement != "BEGIN"]) == 2
+    assert summary["daily_score"] == calculate_daily_score(session, target_date)
+    by_category = {cat["category_id"]: cat for cat in summary["categories"]}
+    assert by_category[None]["category_name"] == "Uncategorized"
+    for category in (work, home):
+        assert by_category[category.id]["category_name"] == category.name
+        assert by_category[category.id]["score"] == calculate_daily_score(
+            session, target_date, category.id
+        )
+        assert by_category[category.id]["time_spent"] == 135
+
+
+def test_rollups_follow_task_completion_and_time_blocks(session: Session):
+    target_date = date.today()
+    today_start = datetime.combine(target_date, datetime.min.time())
+
+    category = Category(name="Work")
+    session.add(category)
+    session.commit()
+
+    task = Task(title="Report", priority=3, category_id=category.id)
+    session.add(task)
+    session.commit()
+    assert get_rollup_summary(session, target_date) == get_productivity_summary(
+        session, target_date
+    )
+
+    task.is_completed = True
+    task.completed_at = today_start + timedelta(hours=9)
+    session.add(
+        TimeBlock(
+            task_id=task.id,
+            start_time=today_start + timedelta(hours=8),
+            end_time=today_start + timedelta(hours=9),
+        )
+    )
+    session.commit()
+
+    day = session.get(ProductivityDay, target_date)
+    assert day.tasks_completed == 1
+    assert day.time_spent == 60
+    logs = session.exec(select(ProductivityLog).where(ProductivityLog.date == target_date)).all()
+    assert [(log.category_id, log.tasks_completed) for log in logs] == [(category.id, 1)]
+    assert get_rollup_summary(session, target_date) == get_productivity_summary(
+        session, target_date
+    )
+
+    task.is_completed = False
+    task.completed_at = None
+    session.commit()
+
+    summary = get_rollup_summary(session, target_date)
+    assert summary == get_productivity_summary(session, target_date)
+    assert summary["total_tasks_completed"] == 0
+    assert summary["categories"][0]["time_spent"] == 60
+
+
+def test_rollup_summary_reads_stored_rows(session: Session):
+    target_date = date.today()
+    today_start = datetime.combine(target_date, datetime.min.time())
+
+    for i in range(30):
+        session.add(
+            Task(
+                title=f"Task {i}", is_completed=True, completed_at=today_start + timedelta(hours=1)
+            )
+        )
+    session.commit()
+    get_rollup_summary(session, target_date)
+
+    statements = []
+    engine = session.get_bind()
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        summary = get_rollup_summary(session, target_date)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert summary["total_tasks_completed"] == 30
+    assert not any("FROM tasks" in statement for statement in statements)
+
+
+def test_productivity_range_matches_daily_summaries(session: Session):
+    start = date(2026, 3, 2)
+    category = Category(name="Work")
+    session.add(category)
+    session.commit()
+
+    for offset in range(10):
+        day_start = datetime.combine(start + timedelta(days=offset), datetime.min.time())
+        task = Task(
+            title=f"Task {offset}",
+            priority=offset % 5,
+            category_id=category.id if offset % 2 else None,
+            is_completed=True,
+            completed_at=day_start + timedelta(hours=10),
+        )
+        session.add(task)
+        session.commit()
+        session.add(
+            TimeBlock(
+                task_id=task.id,
+                start_time=day_start + timedelta(hours=8),
+                end_time=day_start + timedelta(hours=8, minutes=10 * offset + 5),
+            )
+        )
+    session.commit()
+
+    daily = get_productivity_range(session, start, start + timedelta(days=13))
+    assert len(daily) == 14
+    for summary in daily:
+        assert summary == get_productivity_summary(session, summary["date"])
+
+    weeks = aggregate_productivity(daily, "week")
+    assert [(week["start"], week["end"]) for week in weeks] == [
+        (date(2026, 3, 2), date(2026, 3, 8)),
+        (date(2026, 3, 9), date(2026, 3, 15)),
+    ]
+    assert weeks[0]["tasks_completed"] == 7
+    assert weeks[0]["score"] == round(sum(day["daily_score"] for day in daily[:7]) / 7, 2)
+    assert aggregate_productivity(daily, "month")[0]["tasks_completed"] == 10
+
+
+def test_summary_cache_invalidates_only_touched_dates(session: Session):
+    summary_cache.clear()
+    today = date.today()
+    last_week = today - timedelta(days=7)
+    stats = summary_cache.stats()
+
+    get_cached_summary(session, today)
+    get_cached_summary(session, last_week)
+    get_cached_summary(session, last_week)
+    assert summary_cache.stats()["hits"] == stats["hits"] + 1
+    assert summary_cache.stats()["misses"] == stats["misses"] + 2
+
+    session.add(
+        Task(
+            title="Done",
+            is_completed=True,
+            completed_at=datetime.combine(today, datetime.min.time()) + timedelta(hours=1),
+        )
+    )
+    session.commit()
+
+    assert summary_cache.get(last_week) is not None
+    assert summary_cache.get(today) is None
+    assert get_cached_summary(session, today)["total_tasks_completed"] == 1
+
+    category = Category(name="Work")
+    session.add(category)
+    session.commit()
+    assert len(summary_cache) == 0
+
+
+def test_cached_summary_goes_stale_on_another_process_write(session: Session):
+    summary_cache.clear()
+    last_week = date.today() - timedelta(days=7)
+    assert get_cached_summary(session, last_week)["total_tasks_completed"] == 0
+
+    # What another instance's commit leaves behind: new rows, refreshed rollups
+    # and bumped versions, with nothing invalidated in this process.
+    session.execute(
+        insert(Task.__table__).values(
+            title="Done elsewhere",
+            priority=1,
+            is_completed=True,
+            completed_at=datetime.combine(last_week, datetime.min.time()),
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        )
+    )
+    store_productivity_rollup(session, get_productivity_summary(session, last_week))
+    bump_table_versions(session, [Task.__tablename__])
+    session.commit()
+    assert summary_cache.get(last_week) is not None
+
+    assert get_cached_summary(session, last_week)["total_tasks_completed"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+    generation = cache.generation
+    cache.invalidate(["a"])
+    cache.set("a", 10, generation=generation)
+    assert cache.get("a") is None
+
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+
+
+def test_get_category_productivity_reads_only_requested_categories(session: Session):
+    target_date = date.today()
+    today_start = datetime.combine(target_date, datetime.min.time())
+
+    categories = [Category(name=name) for name in ("Work", "Home", "Gym")]
+    session.add_all(categories)
+    session.commit()
+    for i, category in enumerate(categories * 3):
+        task = Task(
+            title=f"Task {i}",
+            priority=i % 5,
+            category_id=category.id,
+            is_completed=True,
+            completed_at=today_start + timedelta(hours=i),
+        )
+        session.add(task)
+        session.commit()
+        session.add(
+            TimeBlock(
+                task_id=task.id,
+                start_time=today_start + timedelta(hours=i),
+                end_time=today_start + timedelta(hours=i, minutes=30),
+            )
+        )
+    session.commit()
+
+    summary = get_productivity_summary(session, target_date)
+    expected = {cat["category_id"]: cat for cat in summary["categories"]}
+    work, home, gym = categories
+
+    scoped = get_category_productivity(session, target_date, [work.id, gym.id])
+
+    assert scoped == {work.id: expected[work.id], gym.id: expected[gym.id]}
+    assert get_category_productivity(session, target_date - timedelta(days=1), [home.id]) == {}
+
+
+def test_time_spent_merges_overlaps_and_clips_at_midnight(session: Session):
+    target_date = date(2026, 3, 10)
+    today_start = datetime.combine(target_date, datetime.min.time())
+
+    task = Task(title="Focus", is_completed=True, completed_at=today_start + timedelta(hours=12))
+    session.add(task)
+    session.commit()
+    session.add_all(
+        [
+            # 60 minutes, half of it overlapping the next block
+            TimeBlock(
+                task_id=task.id,
+                start_time=today_start + timedelta(hours=9),
+                end_time=today_start + timedelta(hours=10),
+            ),
+            TimeBlock(
+                task_id=task.id,
+                start_time=today_start + timedelta(hours=9, minutes=30),
+                end_time=today_start + timedelta(hours=10, minutes=30),
+            ),
+            # 23:00 to 01:00 the next day
+            TimeBlock(
+                task_id=task.id,
+                start_time=today_start + timedelta(hours=23),
+                end_time=today_start + timedelta(hours=25),
+            ),
+        ]
+    )
+    session.commit()
+
+    summary = get_productivity_summary(session, target_date)
+    next_day = get_productivity_summary(session, target_date + timedelta(days=1))
+
+    assert summary["total_time_spent"] == 150
+    assert summary["categories"][0]["time_spent"] == 150
+    assert next_day["total_time_spent"] == 60
+    assert summary["daily_score"] == calculate_daily_score(session, target_date)
+    assert get_rollup_summary(session, target_date + timedelta(days=1)) == next_day
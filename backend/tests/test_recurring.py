@@ -1,9 +1,16 @@
 from datetime import datetime, timedelta
 
+from dateutil.rrule import rrulestr
+
+from services.occurrences import PARALLEL_THRESHOLD, expand_many, occurrence_cache
 from services.recurring import (
     expand_recurring_task,
     get_next_occurrence,
+    occurrences_between,
+    parse_recurrence_rule,
     parse_simple_recurrence,
+    rule_cache,
+    rule_cache_stats,
 )
 
 
@@ -17,6 +24,15 @@ def test_parse_simple_daily_recurrence():
     assert occurrences[7] == base_date + timedelta(days=7)
 
 
+def test_parse_simple_recurrence_keeps_microseconds():
+    base_date = datetime(2026, 1, 1, 9, 0, 0, 123456)
+    occurrences = parse_simple_recurrence("daily", base_date)
+
+    assert len(occurrences) == 30
+    assert occurrences[0] == base_date
+    assert occurrences[1] == base_date + timedelta(days=1)
+
+
 def test_parse_simple_weekly_recurrence():
     base_date = datetime(2024, 1, 1, 10, 0, 0)
     occurrences = parse_simple_recurrence("weekly", base_date)
@@ -78,3 +94,107 @@ def test_empty_recurrence_rule():
     occurrences = expand_recurring_task("", start_date, limit=5)
 
     assert occurrences == []
+
+
+def test_parsed_rules_are_cached_and_keep_their_start():
+    rule_cache.clear()
+    before = rule_cache_stats()
+
+    first = parse_recurrence_rule("FREQ=WEEKLY;BYDAY=MO")
+    second = parse_recurrence_rule("rrule:freq=weekly;byday=mo")
+
+    stats = rule_cache_stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+    assert list(first[:3]) == list(second[:3])
+    assert second._dtstart >= first._dtstart
+
+
+def test_invalid_rules_are_negatively_cached():
+    rule_cache.clear()
+    before = rule_cache_stats()
+
+    assert parse_recurrence_rule("FREQ=SOMETIMES") is None
+    assert parse_recurrence_rule("FREQ=SOMETIMES") is None
+
+    stats = rule_cache_stats()
+    assert stats["parse_errors"] == before["parse_errors"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+
+def test_occurrences_between_seeks_to_the_window():
+    rule = rrulestr("RRULE:FREQ=MINUTELY;INTERVAL=7", dtstart=datetime(2000, 1, 1, 0, 3))
+    start = datetime(2024, 6, 1, 12, 0)
+
+    occurrences = occurrences_between(rule, start, start + timedelta(hours=1), limit=100)
+
+    assert occurrences == list(rule.between(start, start + timedelta(hours=1), inc=True))
+    assert len(occurrences) == 9
+
+
+def test_occurrences_between_keeps_defaults_from_dtstart():
+    monthly = rrulestr("RRULE:FREQ=MONTHLY", dtstart=datetime(2023, 1, 31, 9, 30))
+    weekly = rrulestr("RRULE:FREQ=WEEKLY;INTERVAL=3", dtstart=datetime(2023, 1, 4, 8, 0))
+    start = datetime(2024, 2, 1)
+
+    assert occurrences_between(monthly, start, limit=3) == [
+        datetime(2024, 3, 31, 9, 30),
+        datetime(2024, 5, 31, 9, 30),
+        datetime(2024, 7, 31, 9, 30),
+    ]
+    assert occurrences_between(weekly, start, limit=3) == list(weekly.xafter(start, count=3))
+
+
+def test_occurrences_between_with_count_and_bysetpos():
+    counted = rrulestr("RRULE:FREQ=DAILY;COUNT=10", dtstart=datetime(2024, 1, 1))
+    last_weekday = rrulestr(
+        "RRULE:FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1", dtstart=datetime(2020, 1, 1)
+    )
+    start = datetime(2024, 1, 8)
+
+    assert occurrences_between(counted, start, limit=10) == [
+        datetime(2024, 1, 8),
+        datetime(2024, 1, 9),
+        datetime(2024, 1, 10),
+    ]
+    assert occurrences_between(last_weekday, start, limit=2) == [
+        datetime(2024, 1, 31),
+        datetime(2024, 2, 29),
+    ]
+
+
+def test_occurrences_between_excludes_start_when_not_inclusive():
+    rule = rrulestr("RRULE:FREQ=DAILY", dtstart=datetime(2020, 1, 1, 10, 0))
+    start = datetime(2024, 1, 1, 10, 0)
+
+    assert occurrences_between(rule, start, limit=1) == [start]
+    assert occurrences_between(rule, start, limit=1, inclusive=False) == [start + timedelta(days=1)]
+    assert occurrences_between(rule, start, limit=0) == []
+
+
+def test_expand_many_expands_each_series_once():
+    occurrence_cache.clear()
+    series = ("RRULE:FREQ=DAILY", datetime(2024, 1, 1, 8, 0))
+    start, end = datetime(2024, 2, 1), datetime(2024, 2, 8)
+
+    expanded = expand_many([series, series], start, end, limit=100)
+    before = occurrence_cache.stats()
+    again = expand_many([series], start, end, limit=100)
+
+    assert expanded[series] == [datetime(2024, 2, day, 8, 0) for day in range(1, 8)]
+    assert again == expanded
+    assert occurrence_cache.stats()["hits"] == before["hits"] + 1
+    assert len(occurrence_cache) == 1
+
+
+def test_expand_many_across_workers_matches_in_process():
+    start, end = datetime(2024, 2, 1), datetime(2024, 2, 8)
+    series = [
+        ("RRULE:FREQ=HOURLY;INTERVAL=7", datetime(2024, 1, 1) + timedelta(minutes=minute))
+        for minute in range(PARALLEL_THRESHOLD + 10)
+    ]
+
+    occurrence_cache.clear()
+    pooled = expand_many(series, start, end, limit=100, workers=2)
+    occurrence_cache.clear()
+    assert pooled == expand_many(series, start, end, limit=100)
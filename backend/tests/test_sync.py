@@ -0,0 +1,462 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from database import get_session
+from main import app
+from models import Task, Tombstone
+from schemas import TaskResponse
+from services import change_events, purge_tombstones, record_change, stream_ndjson
+from services.changes import run_scheduled_purge
+from services.streaming import STREAM_BATCH_SIZE
+from services.versions import get_table_versions
+from utils import utcnow
+
+HEADERS = {"X-API-Key": "secret-password"}
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def test_sync_tasks_paginates_with_cursor(client: TestClient):
+    for i in range(5):
+        client.post("/api/tasks", json={"title": f"Task {i}"}, headers=HEADERS)
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/sync/tasks", params=params, headers=HEADERS)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) <= 2
+        seen.extend(task["id"] for task in data)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def test_sync_tasks_single_page_has_no_cursor(client: TestClient):
+    client.post("/api/tasks", json={"title": "Only Task"}, headers=HEADERS)
+
+    response = client.get("/api/sync/tasks", headers=HEADERS)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_sync_categories_ordered_by_update(client: TestClient):
+    first = client.post("/api/categories", json={"name": "First"}, headers=HEADERS).json()
+    client.post("/api/categories", json={"name": "Second"}, headers=HEADERS)
+    client.put(f"/api/categories/{first['id']}", json={"name": "First Renamed"}, headers=HEADERS)
+
+    response = client.get("/api/sync/categories", headers=HEADERS)
+    assert response.status_code == 200
+    assert [c["name"] for c in response.json()] == ["Second", "First Renamed"]
+
+
+def test_sync_invalid_cursor(client: TestClient):
+    response = client.get("/api/sync/time-blocks", params={"cursor": "bogus"}, headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_sync_changes_returns_all_entity_types_in_sequence(client: TestClient):
+    category = client.post("/api/categories", json={"name": "Work"}, headers=HEADERS).json()
+    task = client.post(
+        "/api/tasks", json={"title": "Task", "category_id": category["id"]}, headers=HEADERS
+    ).json()
+    client.post(
+        "/api/time-blocks",
+        json={
+            "task_id": task["id"],
+            "start_time": "2024-01-01T09:00:00",
+            "end_time": "2024-01-01T10:00:00",
+        },
+        headers=HEADERS,
+    )
+
+    response = client.get("/api/sync/changes", headers=HEADERS)
+    assert response.status_code == 200
+    data = response.json()
+    assert [c["entity_type"] for c in data["changes"]] == ["category", "task", "time_block"]
+    assert all(c["operation"] == "create" for c in data["changes"])
+    assert data["changes"][1]["data"]["title"] == "Task"
+    assert data["next_since"] == data["changes"][-1]["seq"]
+    assert data["has_more"] is False
+
+
+def test_sync_changes_since_collapses_to_latest_change(client: TestClient):
+    task = client.post("/api/tasks", json={"title": "Task"}, headers=HEADERS).json()
+    since = client.get("/api/sync/changes", headers=HEADERS).json()["next_since"]
+
+    client.put(f"/api/tasks/{task['id']}", json={"title": "Renamed"}, headers=HEADERS)
+    client.put(f"/api/tasks/{task['id']}", json={"priority": 2}, headers=HEADERS)
+    client.delete(f"/api/tasks/{task['id']}", headers=HEADERS)
+
+    data = client.get("/api/sync/changes", params={"since": since}, headers=HEADERS).json()
+    assert len(data["changes"]) == 1
+    change = data["changes"][0]
+    assert change["entity_id"] == task["id"]
+    assert change["operation"] == "delete"
+    assert change["data"] is None
+    assert data["next_since"] == since + 3
+
+
+def test_sync_changes_pages_with_has_more(client: TestClient):
+    for i in range(3):
+        client.post("/api/tasks", json={"title": f"Task {i}"}, headers=HEADERS)
+
+    first = client.get("/api/sync/changes", params={"limit": 2}, headers=HEADERS).json()
+    assert len(first["changes"]) == 2
+    assert first["has_more"] is True
+
+    rest = client.get(
+        "/api/sync/changes", params={"since": first["next_since"]}, headers=HEADERS
+    ).json()
+    assert len(rest["changes"]) == 1
+    assert rest["has_more"] is False
+
+
+def test_sync_tasks_include_subtask_counts(client: TestClient):
+    task = client.post("/api/tasks", json={"title": "Parent"}, headers=HEADERS).json()
+    client.post("/api/tasks", json={"title": "Loner"}, headers=HEADERS)
+    client.post(f"/api/tasks/{task['id']}/subtasks", params={"title": "Child"}, headers=HEADERS)
+
+    response = client.get("/api/sync/tasks", params={"include": "subtask_counts"}, headers=HEADERS)
+    assert response.status_code == 200
+    assert [(t["title"], t["subtask_count"]) for t in response.json()] == [
+        ("Parent", 1),
+        ("Loner", 0),
+    ]
+
+    embedded = client.get("/api/sync/tasks", params={"include": "subtasks"}, headers=HEADERS)
+    assert [len(t["subtasks"]) for t in embedded.json()] == [1, 0]
+    assert (
+        client.get("/api/sync/tasks", params={"include": "comments"}, headers=HEADERS).status_code
+        == 422
+    )
+
+
+def test_delete_records_tombstones(client: TestClient):
+    task = client.post("/api/tasks", json={"title": "Parent"}, headers=HEADERS).json()
+    subtask = client.post(
+        f"/api/tasks/{task['id']}/subtasks", params={"title": "Child"}, headers=HEADERS
+    ).json()
+    client.delete(f"/api/tasks/{task['id']}", headers=HEADERS)
+
+    response = client.get("/api/sync/deletions", headers=HEADERS)
+    assert response.status_code == 200
+    deletions = {(d["entity_type"], d["entity_id"]) for d in response.json()}
+    assert deletions == {("task", task["id"]), ("subtask", subtask["id"])}
+
+    response = client.get("/api/sync/deletions", params={"entity_type": "subtask"}, headers=HEADERS)
+    assert [d["entity_id"] for d in response.json()] == [subtask["id"]]
+
+
+def test_deletions_before_retention_window_require_resync(client: TestClient):
+    response = client.get(
+        "/api/sync/deletions", params={"deleted_since": "2000-01-01T00:00:00"}, headers=HEADERS
+    )
+    assert response.status_code == 410
+
+
+def test_purge_tombstones_removes_expired_rows(session: Session):
+    session.add(
+        Tombstone(entity_type="task", entity_id=1, deleted_at=utcnow() - timedelta(days=365))
+    )
+    session.add(Tombstone(entity_type="task", entity_id=2))
+    session.commit()
+
+    assert purge_tombstones(session) == 1
+    assert [t.entity_id for t in session.exec(select(Tombstone)).all()] == [2]
+
+
+def test_scheduled_purge_job(session: Session):
+    session.add(
+        Tombstone(entity_type="task", entity_id=1, deleted_at=utcnow() - timedelta(days=365))
+    )
+    session.commit()
+
+    assert run_scheduled_purge(session.get_bind()) == {"purged": 1}
+
+
+def test_push_applies_batch_with_temp_ids(client: TestClient):
+    operations = [
+        {"op": "create", "entity_type": "category", "temp_id": "c1", "data": {"name": "Work"}},
+        {
+            "op": "create",
+            "entity_type": "task",
+            "temp_id": "t1",
+            "data": {"title": "Offline Task", "category_id": "c1"},
+        },
+        {
+            "op": "create",
+            "entity_type": "subtask",
+            "temp_id": "s1",
+            "data": {"task_id": "t1", "title": "Step"},
+        },
+        {
+            "op": "create",
+            "entity_type": "time_block",
+            "data": {
+                "task_id": "t1",
+                "start_time": "2024-01-01T09:00:00",
+                "end_time": "2024-01-01T10:00:00",
+            },
+        },
+        {"op": "update", "entity_type": "task", "id": "t1", "data": {"is_completed": True}},
+    ]
+
+    response = client.post("/api/sync/push", json={"operations": operations}, headers=HEADERS)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status_code"] for r in results] == [201, 201, 201, 201, 200]
+    assert all(r["error"] is None for r in results)
+
+    category_id = results[0]["id"]
+    task_id = results[1]["id"]
+    task = client.get(f"/api/tasks/{task_id}", headers=HEADERS).json()
+    assert task["category_id"] == category_id
+    assert task["is_completed"] is True
+    assert task["completed_at"] is not None
+    assert [s["id"] for s in task["subtasks"]] == [results[2]["id"]]
+
+
+def test_push_reports_per_operation_errors(client: TestClient):
+    default = client.post(
+        "/api/categories", json={"name": "Default", "is_default": True}, headers=HEADERS
+    ).json()
+    operations = [
+        {"op": "create", "entity_type": "task", "data": {"title": "Kept"}},
+        {"op": "update", "entity_type": "task", "id": 999, "data": {"title": "Missing"}},
+        {"op": "create", "entity_type": "task", "data": {"priority": 1}},
+        {"op": "delete", "entity_type": "category", "id": default["id"]},
+        {"op": "create", "entity_type": "subtask", "data": {"task_id": "nope", "title": "x"}},
+    ]
+
+    response = client.post("/api/sync/push", json={"operations": operations}, headers=HEADERS)
+    results = response.json()["results"]
+    assert [r["status_code"] for r in results] == [201, 404, 422, 400, 400]
+    assert results[1]["error"] == "Task not found"
+    assert "title" in results[2]["error"]
+
+    tasks = client.get("/api/tasks", headers=HEADERS).json()
+    assert [t["title"] for t in tasks] == ["Kept"]
+
+
+def test_push_delete_records_changes(client: TestClient):
+    task = client.post("/api/tasks", json={"title": "Doomed"}, headers=HEADERS).json()
+    since = client.get("/api/sync/changes", headers=HEADERS).json()["next_since"]
+
+    response = client.post(
+        "/api/sync/push",
+        json={"operations": [{"op": "delete", "entity_type": "task", "id": task["id"]}]},
+        headers=HEADERS,
+    )
+    assert response.json()["results"][0]["status_code"] == 200
+
+    changes = client.get("/api/sync/changes", params={"since": since}, headers=HEADERS).json()
+    assert [(c["entity_id"], c["operation"]) for c in changes["changes"]] == [
+        (task["id"], "delete")
+    ]
+
+
+def test_sync_tasks_streams_ndjson(client: TestClient):
+    for i in range(3):
+        client.post("/api/tasks", json={"title": f"Task {i}"}, headers=HEADERS)
+
+    response = client.get("/api/sync/tasks", headers={**HEADERS, "Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [task["title"] for task in lines] == ["Task 0", "Task 1", "Task 2"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_sync_ndjson_honours_cursor_and_explicit_limit(client: TestClient):
+    for i in range(4):
+        client.post("/api/tasks", json={"title": f"Task {i}"}, headers=HEADERS)
+
+    cursor = client.get("/api/sync/tasks", params={"limit": 1}, headers=HEADERS).headers[
+        "X-Next-Cursor"
+    ]
+    response = client.get(
+        "/api/sync/tasks",
+        params={"cursor": cursor, "limit": 2},
+        headers={**HEADERS, "Accept": "application/x-ndjson"},
+    )
+    titles = [json.loads(line)["title"] for line in response.text.splitlines()]
+    assert titles == ["Task 1", "Task 2"]
+
+
+async def test_writes_proceed_while_ndjson_stream_is_open(tmp_path):
+    # A file database, since the lock a slow stream holds only exists on disk.
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stream.db'}",
+        connect_args={"check_same_thread": False, "timeout": 0.1},
+    )
+    SQLModel.metadata.create_all(engine)
+    total = STREAM_BATCH_SIZE + 10
+    with Session(engine) as session:
+        session.add_all(Task(title=f"Task {i}") for i in range(total))
+        session.commit()
+
+    response = stream_ndjson(Session(engine), select(Task).order_by(Task.id), TaskResponse)
+    lines = [await anext(response.body_iterator)]
+
+    with Session(engine) as writer:
+        writer.get(Task, total).title = "Renamed"
+        writer.commit()
+
+    lines += [line async for line in response.body_iterator]
+    titles = [json.loads(line)["title"] for line in lines]
+    assert len(titles) == total
+    assert titles[-1] == f"Task {total - 1}"
+    engine.dispose()
+
+
+def test_sync_etag_tracks_only_the_synced_table(client: TestClient):
+    client.post("/api/tasks", json={"title": "Task"}, headers=HEADERS)
+    etag = client.get("/api/sync/tasks", headers=HEADERS).headers["ETag"]
+
+    client.post("/api/categories", json={"name": "Unrelated"}, headers=HEADERS)
+    response = client.get("/api/sync/tasks", headers={**HEADERS, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post("/api/tasks", json={"title": "Another"}, headers=HEADERS)
+    response = client.get("/api/sync/tasks", headers={**HEADERS, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_table_version_bumped_once_per_commit(client: TestClient, session: Session):
+    operations = [
+        {"op": "create", "entity_type": "task", "data": {"title": f"Task {i}"}} for i in range(5)
+    ]
+    client.post("/api/sync/push", json={"operations": operations}, headers=HEADERS)
+
+    assert get_table_versions(session, ["tasks", "categories"]) == {"tasks": 1, "categories": 0}
+
+
+async def _never_disconnected():
+    return False
+
+
+async def test_change_stream_replays_missed_changes_then_pushes_live_ones(
+    client: TestClient, session: Session
+):
+    client.post("/api/tasks", json={"title": "Before"}, headers=HEADERS)
+    second = client.post("/api/tasks", json={"title": "Missed"}, headers=HEADERS).json()
+
+    events = change_events(session, 1, 5, _never_disconnected)
+    assert (await anext(events)).startswith("retry:")
+
+    replayed = await anext(events)
+    assert replayed.startswith("id: 2\nevent: change\n")
+    assert json.loads(replayed.split("data: ")[1])["entity_id"] == second["id"]
+
+    category = client.post("/api/categories", json={"name": "Live"}, headers=HEADERS).json()
+    live = await asyncio.wait_for(anext(events), 1)
+    data = json.loads(live.split("data: ")[1])
+    assert data["seq"] == 3
+    assert (data["entity_type"], data["entity_id"]) == ("category", category["id"])
+    await events.aclose()
+
+
+async def test_change_stream_replay_matches_live_event(client: TestClient, session: Session):
+    client.post("/api/tasks", json={"title": "Before"}, headers=HEADERS)
+    events = change_events(session, 0, 5, _never_disconnected)
+    await anext(events)
+    await anext(events)
+
+    # Batch writes hand the change stream the entries they inserted, as written.
+    client.post("/api/tasks/batch", json={"tasks": [{"title": "Live"}]}, headers=HEADERS)
+    live = await asyncio.wait_for(anext(events), 1)
+    await events.aclose()
+
+    # A reconnecting client's replay reads the change back from the database.
+    session.close()
+    resumed = change_events(session, 1, 5, _never_disconnected)
+    await anext(resumed)
+    assert await anext(resumed) == live
+    await resumed.aclose()
+
+
+async def test_change_stream_sends_heartbeats_when_idle(session: Session):
+    events = change_events(session, 0, 0.01, _never_disconnected)
+    await anext(events)
+    assert await anext(events) == ": heartbeat\n\n"
+    await events.aclose()
+
+
+async def test_change_stream_skips_rolled_back_writes(session: Session):
+    events = change_events(session, 0, 0.05, _never_disconnected)
+    await anext(events)
+
+    with Session(session.get_bind()) as other:
+        record_change(other, "task", 42, "update")
+        other.flush()
+        other.rollback()
+
+    assert await anext(events) == ": heartbeat\n\n"
+    await events.aclose()
+
+
+def test_change_stream_requires_api_key(client: TestClient):
+    response = client.get("/api/sync/stream")
+    assert response.status_code == 401
+
+
+def test_push_rejects_constraint_violation_without_partial_state(
+    client: TestClient, session: Session
+):
+    task = client.post("/api/tasks", json={"title": "Keep"}, headers=HEADERS).json()
+    operations = [
+        {"op": "create", "entity_type": "task", "temp_id": "t1", "data": {"title": "New"}},
+        {"op": "update", "entity_type": "task", "id": task["id"], "data": {"title": None}},
+        {"op": "update", "entity_type": "task", "id": "t1", "data": {"priority": 2}},
+    ]
+    response = client.post("/api/sync/push", json={"operations": operations}, headers=HEADERS)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status_code"] for r in results] == [201, 409, 200]
+
+    assert client.get(f"/api/tasks/{task['id']}", headers=HEADERS).json()["title"] == "Keep"
+    assert client.get(f"/api/tasks/{results[0]['id']}", headers=HEADERS).json()["priority"] == 2
+    changes = client.get("/api/sync/changes", headers=HEADERS).json()["changes"]
+    assert [(c["entity_id"], c["operation"]) for c in changes] == [
+        (task["id"], "create"),
+        (results[0]["id"], "update"),
+    ]
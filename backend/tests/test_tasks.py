@@ -1,12 +1,17 @@
-from datetime import datetime, timedelta
+import json
+from datetime import UTC, datetime, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine, select
 from sqlmodel.pool import StaticPool
 
+from config import settings
 from database import get_session
 from main import app
+from models import Task, create_task_search
+from services.occurrences import roll_forward_occurrences
 
 
 @pytest.fixture(name="session")
@@ -192,3 +197,411 @@ def test_filter_tasks_by_completion(client: TestClient):
     data = response.json()
     assert len(data) >= 1
     assert all(task["is_completed"] for task in data)
+
+
+def test_get_tasks_ndjson(client: TestClient):
+    for title in ["First", "Second"]:
+        client.post(
+            "/api/tasks",
+            json={"title": title, "priority": 1},
+            headers={"X-API-Key": "secret-password"},
+        )
+
+    response = client.get(
+        "/api/tasks",
+        headers={"X-API-Key": "secret-password", "Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert len(response.text.splitlines()) == 2
+
+
+def test_get_occurrences_expands_recurring_tasks(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    tasks = [
+        {"title": "Standup", "recurrence_rule": "FREQ=DAILY", "due_date": "2020-01-01T09:00:00"},
+        {"title": "Review", "recurrence_rule": "FREQ=DAILY", "due_date": "2020-01-01T09:00:00"},
+        {
+            "title": "Retro",
+            "recurrence_rule": "FREQ=WEEKLY;BYDAY=FR",
+            "due_date": "2024-01-05T16:00:00",
+        },
+        {"title": "Broken", "recurrence_rule": "FREQ=SOMETIMES"},
+        {"title": "One-off", "due_date": "2024-03-04T10:00:00"},
+    ]
+    for task in tasks:
+        client.post("/api/tasks", json=task, headers=headers)
+
+    response = client.get(
+        "/api/tasks/occurrences",
+        params={"start": "2024-03-04T00:00:00", "end": "2024-03-11T00:00:00"},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    occurrences = response.json()
+    assert len(occurrences) == 15
+    assert [o["title"] for o in occurrences[:2]] == ["Standup", "Review"]
+    assert occurrences[0]["occurs_at"] == "2024-03-04T09:00:00"
+    assert [o["occurs_at"] for o in occurrences if o["title"] == "Retro"] == ["2024-03-08T16:00:00"]
+    assert all(o["title"] in {"Standup", "Review", "Retro"} for o in occurrences)
+
+
+def test_get_occurrences_validates_window(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+
+    reversed_window = client.get(
+        "/api/tasks/occurrences",
+        params={"start": "2024-03-11T00:00:00", "end": "2024-03-04T00:00:00"},
+        headers=headers,
+    )
+    too_long = client.get(
+        "/api/tasks/occurrences",
+        params={"start": "2024-01-01T00:00:00", "end": "2026-01-01T00:00:00"},
+        headers=headers,
+    )
+
+    assert reversed_window.status_code == 400
+    assert too_long.status_code == 400
+
+
+def test_recurring_tasks_store_occurrences_with_completion_state(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    today = datetime.combine(datetime.now(UTC).date(), datetime.min.time())
+    due = today + timedelta(days=1, hours=9)
+    task = client.post(
+        "/api/tasks",
+        json={"title": "Gym", "recurrence_rule": "FREQ=DAILY", "due_date": due.isoformat()},
+        headers=headers,
+    ).json()
+    window = {"start": today.isoformat(), "end": (today + timedelta(days=8)).isoformat()}
+
+    occurrences = client.get("/api/tasks/occurrences", params=window, headers=headers).json()
+    assert [o["occurs_at"] for o in occurrences] == [
+        (due + timedelta(days=offset)).isoformat() for offset in range(7)
+    ]
+    assert all(o["occurrence_id"] is not None for o in occurrences)
+
+    first, second = occurrences[0], occurrences[1]
+    completed = client.put(
+        f"/api/tasks/occurrences/{first['occurrence_id']}",
+        params={"is_completed": True},
+        headers=headers,
+    )
+    assert completed.status_code == 200
+    assert completed.json()["is_completed"] is True
+
+    client.put(
+        f"/api/tasks/{task['id']}",
+        json={"recurrence_rule": "FREQ=DAILY;INTERVAL=2"},
+        headers=headers,
+    )
+    occurrences = client.get("/api/tasks/occurrences", params=window, headers=headers).json()
+    assert [o["occurs_at"] for o in occurrences] == [
+        (due + timedelta(days=offset)).isoformat() for offset in (0, 2, 4, 6)
+    ]
+    assert occurrences[0]["occurrence_id"] == first["occurrence_id"]
+    assert occurrences[0]["is_completed"] is True
+    assert second["occurrence_id"] not in {o["occurrence_id"] for o in occurrences}
+
+    client.delete(f"/api/tasks/{task['id']}", headers=headers)
+    assert client.get("/api/tasks/occurrences", params=window, headers=headers).json() == []
+
+
+def test_roll_forward_extends_stored_occurrences(client: TestClient, session: Session):
+    headers = {"X-API-Key": "secret-password"}
+    today = datetime.combine(datetime.now(UTC).date(), datetime.min.time())
+    client.post(
+        "/api/tasks",
+        json={
+            "title": "Report",
+            "recurrence_rule": "FREQ=WEEKLY",
+            "due_date": (today + timedelta(hours=10)).isoformat(),
+        },
+        headers=headers,
+    )
+    start = today + timedelta(days=settings.occurrence_horizon_days + 30)
+    window = {"start": start.isoformat(), "end": (start + timedelta(days=7)).isoformat()}
+
+    before = client.get("/api/tasks/occurrences", params=window, headers=headers).json()
+    assert [o["occurrence_id"] for o in before] == [None]
+
+    assert roll_forward_occurrences(session, start + timedelta(days=7)) == 1
+    session.commit()
+
+    after = client.get("/api/tasks/occurrences", params=window, headers=headers).json()
+    assert [o["occurs_at"] for o in after] == [o["occurs_at"] for o in before]
+    assert after[0]["occurrence_id"] is not None
+
+
+def _pages(client: TestClient, url: str, params: dict) -> list[list[dict]]:
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(
+            url,
+            params={**params, **({"cursor": cursor} if cursor else {})},
+            headers={"X-API-Key": "secret-password"},
+        )
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_get_tasks_cursor_pages_match_offset_order(client: TestClient, session: Session):
+    headers = {"X-API-Key": "secret-password"}
+    category = client.post("/api/categories", json={"name": "Work"}, headers=headers).json()
+    for i in range(7):
+        client.post(
+            "/api/tasks",
+            json={"title": f"Task {i}", "category_id": category["id"] if i % 2 else None},
+            headers=headers,
+        )
+    # Same created_at for several tasks: the id breaks the tie.
+    for task in session.exec(select(Task)).all()[:4]:
+        task.created_at = datetime(2024, 1, 1)
+    session.commit()
+
+    pages = _pages(client, "/api/tasks", {"limit": 3})
+    offset = client.get("/api/tasks", params={"skip": 3, "limit": 3}, headers=headers).json()
+    everything = client.get("/api/tasks", params={"limit": 100}, headers=headers).json()
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [task["id"] for page in pages for task in page] == [task["id"] for task in everything]
+    assert offset == pages[1]
+
+    filtered = _pages(client, "/api/tasks", {"limit": 2, "category_id": category["id"]})
+    assert [task["title"] for page in filtered for task in page] == [
+        "Task 5",
+        "Task 3",
+        "Task 1",
+    ]
+
+    both = client.get("/api/tasks", params={"skip": 3, "cursor": "x"}, headers=headers)
+    assert both.status_code == 400
+
+
+def test_get_tasks_rejects_out_of_range_limit(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    client.post("/api/tasks", json={"title": "Task"}, headers=headers)
+
+    for limit in (0, -1, 1001):
+        response = client.get("/api/tasks", params={"limit": limit}, headers=headers)
+        assert response.status_code == 422
+    assert len(client.get("/api/tasks", params={"limit": 1}, headers=headers).json()) == 1
+
+
+def test_batch_create_update_and_delete_tasks(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    created = client.post(
+        "/api/tasks/batch",
+        json={"tasks": [{"title": "A"}, {"title": "B", "priority": 9}, {"title": "C"}]},
+        headers=headers,
+    )
+    assert created.status_code == 200
+    results = created.json()["results"]
+    assert [r["status_code"] for r in results] == [201, 422, 201]
+    assert "priority" in results[1]["error"]
+    first, third = results[0]["id"], results[2]["id"]
+    client.post(f"/api/tasks/{first}/subtasks", params={"title": "Step"}, headers=headers)
+
+    updated = client.put(
+        "/api/tasks/batch",
+        json={
+            "tasks": [
+                {"id": first, "is_completed": True},
+                {"id": third, "is_completed": True, "title": "C2"},
+                {"id": 999, "is_completed": True},
+            ]
+        },
+        headers=headers,
+    ).json()["results"]
+    assert [r["status_code"] for r in updated] == [200, 200, 404]
+    completed_at = client.get(f"/api/tasks/{first}", headers=headers).json()["completed_at"]
+    assert completed_at is not None
+    assert client.get(f"/api/tasks/{third}", headers=headers).json()["title"] == "C2"
+
+    # Completing a completed task keeps its timestamp; reopening clears it.
+    client.put(
+        "/api/tasks/batch", json={"tasks": [{"id": first, "is_completed": True}]}, headers=headers
+    )
+    assert client.get(f"/api/tasks/{first}", headers=headers).json()["completed_at"] == completed_at
+    client.put(
+        "/api/tasks/batch", json={"tasks": [{"id": third, "is_completed": False}]}, headers=headers
+    )
+    reopened = client.get(f"/api/tasks/{third}", headers=headers).json()
+    assert reopened["is_completed"] is False
+    assert reopened["completed_at"] is None
+
+    deleted = client.post(
+        "/api/tasks/batch/delete", json={"ids": [first, first, 999]}, headers=headers
+    ).json()["results"]
+    assert [r["status_code"] for r in deleted] == [200, 404, 404]
+    assert client.get(f"/api/tasks/{first}", headers=headers).status_code == 404
+    changes = client.get("/api/sync/changes", headers=headers).json()["changes"]
+    assert {(c["entity_type"], c["operation"]) for c in changes} >= {
+        ("task", "delete"),
+        ("subtask", "delete"),
+        ("task", "update"),
+    }
+
+
+def test_batch_writes_keep_rollups_and_occurrences_current(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    today = datetime.now(UTC).date()
+    due = datetime.combine(today, datetime.min.time()) + timedelta(days=1, hours=9)
+    ids = [
+        r["id"]
+        for r in client.post(
+            "/api/tasks/batch",
+            json={
+                "tasks": [
+                    {"title": "Gym", "recurrence_rule": "FREQ=DAILY", "due_date": due.isoformat()},
+                    {"title": "Report", "priority": 3},
+                ]
+            },
+            headers=headers,
+        ).json()["results"]
+    ]
+    window = {
+        "start": due.isoformat(),
+        "end": (due + timedelta(days=3)).isoformat(),
+    }
+    occurrences = client.get("/api/tasks/occurrences", params=window, headers=headers).json()
+    assert len(occurrences) == 3
+    assert all(o["occurrence_id"] is not None for o in occurrences)
+
+    summary = client.get(
+        "/api/productivity/summary", params={"date": today.isoformat()}, headers=headers
+    ).json()
+    assert summary["total_tasks_completed"] == 0
+
+    client.put(
+        "/api/tasks/batch",
+        json={
+            "tasks": [{"id": ids[0], "recurrence_rule": None}, {"id": ids[1], "is_completed": True}]
+        },
+        headers=headers,
+    )
+    assert client.get("/api/tasks/occurrences", params=window, headers=headers).json() == []
+    summary = client.get(
+        "/api/productivity/summary", params={"date": today.isoformat()}, headers=headers
+    ).json()
+    assert summary["total_tasks_completed"] == 1
+
+
+def test_get_tasks_include_subtasks(client: TestClient, session: Session):
+    headers = {"X-API-Key": "secret-password"}
+    tasks = [
+        client.post("/api/tasks", json={"title": title}, headers=headers).json()
+        for title in ("A", "B", "C")
+    ]
+    first, second = (
+        client.post(
+            f"/api/tasks/{tasks[0]['id']}/subtasks", params={"title": title}, headers=headers
+        ).json()
+        for title in ("First", "Second")
+    )
+    client.put(f"/api/tasks/subtasks/{second['id']}", params={"order": -1}, headers=headers)
+    subtask = client.post(
+        f"/api/tasks/{tasks[1]['id']}/subtasks", params={"title": "Only"}, headers=headers
+    ).json()
+    client.put(
+        f"/api/tasks/subtasks/{subtask['id']}", params={"is_completed": True}, headers=headers
+    )
+
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    response = client.get("/api/tasks", params={"include": "subtasks"}, headers=headers)
+    assert response.status_code == 200
+    by_title = {task["title"]: task for task in response.json()}
+    assert [s["title"] for s in by_title["A"]["subtasks"]] == ["Second", "First"]
+    assert [s["id"] for s in by_title["B"]["subtasks"]] == [subtask["id"]]
+    assert by_title["C"]["subtasks"] == []
+    task_queries = [s for s in statements if "FROM tasks" in s or "FROM subtasks" in s]
+    assert len(task_queries) == 2
+
+    counts = client.get("/api/tasks", params={"include": "subtask_counts"}, headers=headers).json()
+    assert {t["title"]: (t["subtask_count"], t["completed_subtask_count"]) for t in counts} == {
+        "A": (2, 0),
+        "B": (1, 1),
+        "C": (0, 0),
+    }
+    plain = client.get("/api/tasks", headers=headers).json()
+    assert all("subtasks" not in t and "subtask_count" not in t for t in plain)
+
+    streamed = client.get(
+        "/api/tasks",
+        params={"include": "subtask_counts"},
+        headers={**headers, "Accept": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert {t["title"]: t["subtask_count"] for t in lines} == {"A": 2, "B": 1, "C": 0}
+
+    # Subtask writes change the ETag of embedded listings.
+    etag = client.get("/api/tasks", params={"include": "subtasks"}, headers=headers).headers["ETag"]
+    client.post(f"/api/tasks/{tasks[2]['id']}/subtasks", params={"title": "New"}, headers=headers)
+    refreshed = client.get(
+        "/api/tasks", params={"include": "subtasks"}, headers={**headers, "If-None-Match": etag}
+    )
+    assert refreshed.status_code == 200
+
+
+def test_search_tasks(client: TestClient):
+    headers = {"X-API-Key": "secret-password"}
+    payloads = [
+        {"title": "Quarterly report", "category_id": 1},
+        {"title": "Groceries", "notes": "milk for the report party", "category_id": 1},
+        {"title": "Café visit", "description": "Review the quarterly numbers", "category_id": 2},
+    ]
+    tasks = [client.post("/api/tasks", json=p, headers=headers).json() for p in payloads]
+
+    def search(**params):
+        response = client.get("/api/tasks/search", params=params, headers=headers)
+        assert response.status_code == 200
+        return [task["title"] for task in response.json()]
+
+    # Title matches rank above notes matches.
+    assert search(q="report") == ["Quarterly report", "Groceries"]
+    assert search(q="quart") == ["Quarterly report", "Café visit"]
+    assert search(q="quarterly rev") == ["Café visit"]
+    assert search(q="cafe") == ["Café visit"]
+    assert search(q='report" OR milk') == []
+    assert search(q="???") == []
+    assert search(q="report", category_id=1, is_completed=False) == [
+        "Quarterly report",
+        "Groceries",
+    ]
+
+    client.put(f"/api/tasks/{tasks[0]['id']}", json={"is_completed": True}, headers=headers)
+    assert search(q="report", is_completed=True) == ["Quarterly report"]
+    client.put(f"/api/tasks/{tasks[1]['id']}", json={"notes": None}, headers=headers)
+    client.post("/api/tasks/batch/delete", json={"ids": [tasks[0]["id"]]}, headers=headers)
+    assert search(q="report") == []
+    client.put(
+        "/api/tasks/batch",
+        json={"tasks": [{"id": tasks[2]["id"], "title": "Report review"}]},
+        headers=headers,
+    )
+    assert search(q="report") == ["Report review"]
+
+
+def test_create_task_search_indexes_existing_tasks(client: TestClient, session: Session):
+    headers = {"X-API-Key": "secret-password"}
+    client.post("/api/tasks", json={"title": "Renew passport"}, headers=headers)
+    connection = session.connection()
+    connection.execute(text("DROP TABLE tasks_fts"))
+    for trigger in ("insert", "update", "delete"):
+        connection.execute(text(f"DROP TRIGGER tasks_fts_{trigger}"))
+    session.commit()
+
+    create_task_search(session.connection())
+    session.commit()
+    response = client.get("/api/tasks/search", params={"q": "passp"}, headers=headers)
+    assert [task["title"] for task in response.json()] == ["Renew passport"]
@@ -34,6 +34,33 @@ export async function fetchFromAPI(
   return response.text();
 }
 
+export async function fetchAllPagesFromAPI(endpoint: string, apiKey?: string): Promise<unknown[]> {
+  const headers = new Headers();
+  if (apiKey) {
+    headers.set('x-api-key', apiKey);
+  }
+
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const items: unknown[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const url = cursor
+      ? `${API_URL}${endpoint}${separator}cursor=${encodeURIComponent(cursor)}`
+      : `${API_URL}${endpoint}`;
+    const response = await fetch(url, { headers });
+
+    if (!response.ok) {
+      throw new Error(`API request failed: ${response.status} ${response.statusText}`);
+    }
+
+    items.push(...((await response.json()) as unknown[]));
+    cursor = response.headers.get('x-next-cursor');
+  } while (cursor);
+
+  return items;
+}
+
 export async function getHello() {
   return fetchFromAPI('/api/hello');
 }
@@ -2,7 +2,7 @@
 
 import * as React from 'react';
 
-import { fetchFromAPI } from '@/lib/api';
+import { fetchAllPagesFromAPI, fetchFromAPI } from '@/lib/api';
 import { useAuth } from '@/lib/auth/AuthProvider';
 import {
   type OutboxItem,
@@ -274,29 +274,26 @@ export function SyncProvider({ children }: { children: React.ReactNode }) {
 
     const now = new Date().toISOString();
 
-    const categories = (await fetchFromAPI(
+    const categories = (await fetchAllPagesFromAPI(
       `/api/sync/categories${
         state.lastPulledAt.categories
           ? `?modified_since=${encodeURIComponent(state.lastPulledAt.categories)}`
           : ''
       }`,
-      {},
       session.apiKey
     )) as RemoteCategory[];
 
-    const tasks = (await fetchFromAPI(
+    const tasks = (await fetchAllPagesFromAPI(
       `/api/sync/tasks${
         state.lastPulledAt.tasks ? `?modified_since=${encodeURIComponent(state.lastPulledAt.tasks)}` : ''
       }`,
-      {},
       session.apiKey
     )) as RemoteTask[];
 
-    const timeBlocks = (await fetchFromAPI(
+    const timeBlocks = (await fetchAllPagesFromAPI(
       `/api/sync/time-blocks${
         state.lastPulledAt.timeBlocks ? `?modified_since=${encodeURIComponent(state.lastPulledAt.timeBlocks)}` : ''
       }`,
-      {},
       session.apiKey
     )) as RemoteTimeBlock[];
 